@@ -1,20 +1,39 @@
 # common_utils.py
-from dotenv import load_dotenv
+from dotenv import load_dotenv, find_dotenv
 import os
 import logging
+import functools
 import json
 import re
-from datetime import datetime, timezone
+import sys
+import threading
+import time
+from collections import namedtuple
+from concurrent.futures import ThreadPoolExecutor
+from datetime import date, datetime, timezone
+from types import MappingProxyType
 from pyairtable import Api as PyAirtableApi # For type hinting if needed, actual client in main
+from pyairtable import retry_strategy
+from requests.adapters import HTTPAdapter
 from jira import JIRA, JIRAError # For type hinting
 
 # --- INITIAL CONFIGURATION LOADING ---
 # This should be done ONCE in main_controller.py, and then values passed or imported.
 # For simplicity here, we assume .env is loaded if this module is imported.
 # In a larger app, you'd use a config object.
-if not load_dotenv():
+# Path of the .env loaded here (None if none). main_controller checks it so the same file isn't parsed twice.
+DOTENV_PATH_LOADED = None
+_dotenv_path = find_dotenv()
+if _dotenv_path and load_dotenv(_dotenv_path, override=False):
+    DOTENV_PATH_LOADED = os.path.abspath(_dotenv_path)
+else:
     print("Warning: .env file not found by common_utils.py. Ensure it's loaded by the main script.")
 
+def _getenv_interned(var_name, default=None):
+    """os.getenv for field-name constants; interned because they are used as dict keys for every record."""
+    value = os.getenv(var_name, default)
+    return sys.intern(value) if value else value
+
 # --- SCRIPT BEHAVIOR & FEATURE FLAGS ---
 DRY_RUN = os.getenv('DRY_RUN', 'False').lower() == 'true'
 SCRIPT_DEBUG_MODE = os.getenv('SCRIPT_DEBUG_MODE', 'False').lower() == 'true'
@@ -28,47 +47,62 @@ ENABLE_PHASE3 = os.getenv('ENABLE_PHASE3_TWO_WAY_SYNC', 'False').lower() == 'tru
 ENABLE_SPRINT_MANAGEMENT = os.getenv('ENABLE_SPRINT_MANAGEMENT_IN_PHASE3', 'False').lower() == 'true'
 ENABLE_COMMENT_SYNC = os.getenv('ENABLE_TWO_WAY_COMMENT_SYNC', 'False').lower() == 'true'
 ENABLE_JIRA_FIELD_SYNC_FROM_AIRTABLE = os.getenv('ENABLE_JIRA_FIELD_SYNC_FROM_AIRTABLE', 'True').lower() == 'true'
+ENABLE_AIRTABLE_UPDATES = os.getenv('ENABLE_AIRTABLE_UPDATES', 'False').lower() == 'true'
 
 # --- AIRTABLE CONFIG (from .env) ---
 AIRTABLE_BASE_ID_CONFIG = os.getenv('AIRTABLE_BASE_ID') # Renamed to avoid conflict with function arg
 AIRTABLE_TABLE_NAME_CONFIG = os.getenv('AIRTABLE_TABLE_NAME')
 AIRTABLE_TOKEN_CONFIG = os.getenv('AIRTABLE_PERSONAL_ACCESS_TOKEN')
-AIRTABLE_LAST_MODIFIED_FIELD_NAME = os.getenv('AIRTABLE_LAST_MODIFIED_FIELD_NAME')
+AIRTABLE_LAST_MODIFIED_FIELD_NAME = _getenv_interned('AIRTABLE_LAST_MODIFIED_FIELD_NAME')
 
 # Main Table Fields
-AIRTABLE_HEADLINE_FIELD = os.getenv('AIRTABLE_HEADLINE_FIELD_NAME', "Full Name")
-AIRTABLE_STATUS_FIELD = os.getenv('AIRTABLE_STATUS_FIELD_NAME', "Status")
-AIRTABLE_EXPERIMENT_ID_FIELD = os.getenv('AIRTABLE_EXPERIMENT_ID_FIELD_NAME')
-AIRTABLE_TEST_ID_FIELD = os.getenv('AIRTABLE_TEST_ID_FIELD_NAME')
-AIRTABLE_JIRA_KEY_FIELD = os.getenv('AIRTABLE_JIRA_KEY_FIELD_NAME') # Critical for matching
-AIRTABLE_JIRA_URL_FIELD = os.getenv('AIRTABLE_JIRA_URL_FIELD_NAME')
+AIRTABLE_HEADLINE_FIELD = _getenv_interned('AIRTABLE_HEADLINE_FIELD_NAME', "Full Name")
+AIRTABLE_STATUS_FIELD = _getenv_interned('AIRTABLE_STATUS_FIELD_NAME', "Status")
+AIRTABLE_EXPERIMENT_ID_FIELD = _getenv_interned('AIRTABLE_EXPERIMENT_ID_FIELD_NAME')
+AIRTABLE_TEST_ID_FIELD = _getenv_interned('AIRTABLE_TEST_ID_FIELD_NAME')
+AIRTABLE_JIRA_KEY_FIELD = _getenv_interned('AIRTABLE_JIRA_KEY_FIELD_NAME') # Critical for matching
+AIRTABLE_JIRA_URL_FIELD = _getenv_interned('AIRTABLE_JIRA_URL_FIELD_NAME')
 # ... (Load ALL AIRTABLE_FIELDNAME_FIELD variable from .env here)
-AIRTABLE_OBSERVATION_FIELD = os.getenv('AIRTABLE_OBSERVATION_FIELD')
-AIRTABLE_IDEA_FIELD = os.getenv('AIRTABLE_IDEA_FIELD')
-AIRTABLE_HYPOTHESIS_FIELD = os.getenv('AIRTABLE_HYPOTHESIS_FIELD')
-AIRTABLE_COUNTRY_FIELD = os.getenv('AIRTABLE_COUNTRY_FIELD') # ISO Code field
-AIRTABLE_PAGE_TYPE_FIELD = os.getenv('AIRTABLE_PAGE_TYPE_FIELD')
-AIRTABLE_PRIMARY_METRIC_FIELD = os.getenv('AIRTABLE_PRIMARY_METRIC_FIELD')
-AIRTABLE_SECONDARY_METRICS_FIELD = os.getenv('AIRTABLE_SECONDARY_METRICS_FIELD')
-AIRTABLE_PLATFORM_FIELD = os.getenv('AIRTABLE_PLATFORM_FIELD')
-AIRTABLE_DEVICE_FIELD = os.getenv('AIRTABLE_DEVICE_FIELD')
-AIRTABLE_VAIMO_COMMENTS_FIELD = os.getenv('AIRTABLE_VAIMO_COMMENTS_FIELD')
-AIRTABLE_SPONSOR_COMMENTS_FIELD = os.getenv('AIRTABLE_SPONSOR_COMMENTS_FIELD')
-AIRTABLE_OTHER_COMMENTS_FIELD = os.getenv('AIRTABLE_OTHER_COMMENTS_FIELD')
-AIRTABLE_TODO_NEEDED_FIELD = os.getenv('AIRTABLE_TODO_NEEDED_FIELD')
-AIRTABLE_HOW_TO_QA_FIELD = os.getenv('AIRTABLE_HOW_TO_QA_FIELD')
-AIRTABLE_TYPE_OF_TEST_FIELD = os.getenv('AIRTABLE_TYPE_OF_TEST_FIELD')
-AIRTABLE_PLANNED_START_DATE_FIELD = os.getenv('AIRTABLE_PLANNED_START_DATE_FIELD')
-AIRTABLE_ESTIMATED_END_DATE_FIELD = os.getenv('AIRTABLE_ESTIMATED_END_DATE_FIELD')
-AIRTABLE_GOAL_FIELD = os.getenv('AIRTABLE_GOAL_FIELD') # For Cluster mapping
-AIRTABLE_IDEA_NAME_FIELD = os.getenv('AIRTABLE_IDEA_NAME_FIELD')
+AIRTABLE_OBSERVATION_FIELD = _getenv_interned('AIRTABLE_OBSERVATION_FIELD')
+AIRTABLE_IDEA_FIELD = _getenv_interned('AIRTABLE_IDEA_FIELD')
+AIRTABLE_HYPOTHESIS_FIELD = _getenv_interned('AIRTABLE_HYPOTHESIS_FIELD')
+AIRTABLE_COUNTRY_FIELD = _getenv_interned('AIRTABLE_COUNTRY_FIELD') # ISO Code field
+AIRTABLE_PAGE_TYPE_FIELD = _getenv_interned('AIRTABLE_PAGE_TYPE_FIELD')
+AIRTABLE_PRIMARY_METRIC_FIELD = _getenv_interned('AIRTABLE_PRIMARY_METRIC_FIELD')
+AIRTABLE_SECONDARY_METRICS_FIELD = _getenv_interned('AIRTABLE_SECONDARY_METRICS_FIELD')
+AIRTABLE_PLATFORM_FIELD = _getenv_interned('AIRTABLE_PLATFORM_FIELD')
+AIRTABLE_DEVICE_FIELD = _getenv_interned('AIRTABLE_DEVICE_FIELD')
+AIRTABLE_VAIMO_COMMENTS_FIELD = _getenv_interned('AIRTABLE_VAIMO_COMMENTS_FIELD')
+AIRTABLE_SPONSOR_COMMENTS_FIELD = _getenv_interned('AIRTABLE_SPONSOR_COMMENTS_FIELD')
+AIRTABLE_OTHER_COMMENTS_FIELD = _getenv_interned('AIRTABLE_OTHER_COMMENTS_FIELD')
+AIRTABLE_TODO_NEEDED_FIELD = _getenv_interned('AIRTABLE_TODO_NEEDED_FIELD')
+AIRTABLE_HOW_TO_QA_FIELD = _getenv_interned('AIRTABLE_HOW_TO_QA_FIELD')
+AIRTABLE_TYPE_OF_TEST_FIELD = _getenv_interned('AIRTABLE_TYPE_OF_TEST_FIELD')
+AIRTABLE_PLANNED_START_DATE_FIELD = _getenv_interned('AIRTABLE_PLANNED_START_DATE_FIELD')
+AIRTABLE_ESTIMATED_END_DATE_FIELD = _getenv_interned('AIRTABLE_ESTIMATED_END_DATE_FIELD')
+AIRTABLE_GOAL_FIELD = _getenv_interned('AIRTABLE_GOAL_FIELD') # For Cluster mapping
+AIRTABLE_IDEA_NAME_FIELD = _getenv_interned('AIRTABLE_IDEA_NAME_FIELD')
+# Every main-table field the sync reads, for projecting bulk fetches (dict.fromkeys dedupes, keeps order)
+AIRTABLE_MAIN_TABLE_FIELDS = [name for name in dict.fromkeys((
+    AIRTABLE_LAST_MODIFIED_FIELD_NAME, AIRTABLE_HEADLINE_FIELD, AIRTABLE_STATUS_FIELD, AIRTABLE_EXPERIMENT_ID_FIELD,
+    AIRTABLE_TEST_ID_FIELD, AIRTABLE_JIRA_KEY_FIELD, AIRTABLE_JIRA_URL_FIELD, AIRTABLE_OBSERVATION_FIELD,
+    AIRTABLE_IDEA_FIELD, AIRTABLE_HYPOTHESIS_FIELD, AIRTABLE_COUNTRY_FIELD, AIRTABLE_PAGE_TYPE_FIELD,
+    AIRTABLE_PRIMARY_METRIC_FIELD, AIRTABLE_SECONDARY_METRICS_FIELD, AIRTABLE_PLATFORM_FIELD, AIRTABLE_DEVICE_FIELD,
+    AIRTABLE_VAIMO_COMMENTS_FIELD, AIRTABLE_SPONSOR_COMMENTS_FIELD, AIRTABLE_OTHER_COMMENTS_FIELD,
+    AIRTABLE_TODO_NEEDED_FIELD, AIRTABLE_HOW_TO_QA_FIELD, AIRTABLE_TYPE_OF_TEST_FIELD,
+    AIRTABLE_PLANNED_START_DATE_FIELD, AIRTABLE_ESTIMATED_END_DATE_FIELD, AIRTABLE_GOAL_FIELD, AIRTABLE_IDEA_NAME_FIELD,
+)) if name]
 
 # Statuses for processing
 AIRTABLE_STATUSES_FOR_JIRA_CREATION_LIST = [s.strip() for s in os.getenv('AIRTABLE_STATUSES_FOR_JIRA_CREATION', "Idea: Evaluated").split(',')]
 AIRTABLE_STATUSES_FOR_SYNC_LIST = [s.strip() for s in os.getenv('AIRTABLE_STATUSES_FOR_SYNC', "").split(',')]
+# Set versions for membership tests; the _LIST names keep the configured order.
+AIRTABLE_STATUSES_FOR_JIRA_CREATION = frozenset(s for s in AIRTABLE_STATUSES_FOR_JIRA_CREATION_LIST if s)
+AIRTABLE_STATUSES_FOR_SYNC = frozenset(s for s in AIRTABLE_STATUSES_FOR_SYNC_LIST if s)
 
 
 # --- JIRA CONFIG (from .env) ---
+JIRA_SERVER_URL = (os.getenv('JIRA_SERVER_URL') or '').rstrip('/') # Issue URLs are {server}/browse/{key}
 JIRA_PROJECT_KEY_CONFIG = os.getenv('JIRA_PROJECT_KEY') 
 JIRA_BOARD_NAME_CONFIG = os.getenv('JIRA_BOARD_NAME')
 JIRA_ISSUE_TYPE_NAME_CONFIG = os.getenv('JIRA_ISSUE_TYPE_NAME')
@@ -81,37 +115,49 @@ print(f"DEBUG from common_utils.py: JIRA_BOARD_ID_CONFIG loaded as: '{JIRA_BOARD
 
 
 # Jira Custom Fields
-JIRA_AIRTABLE_ID_CF = os.getenv('JIRA_AIRTABLE_RECORD_ID_CUSTOM_FIELD') # Critical for matching
-JIRA_CLUSTER_CF = os.getenv('JIRA_CLUSTER_CUSTOM_FIELD')
-JIRA_AFFECTED_COUNTRY_CF = os.getenv('JIRA_AFFECTED_COUNTRY_CUSTOM_FIELD')
-JIRA_REQUIRED_DATE_CF = os.getenv('JIRA_REQUIRED_DATE_CUSTOM_FIELD')
-JIRA_DUE_DATE_CF = os.getenv('JIRA_DUE_DATE_CUSTOM_FIELD', 'duedate')
+JIRA_AIRTABLE_ID_CF = _getenv_interned('JIRA_AIRTABLE_RECORD_ID_CUSTOM_FIELD') # Critical for matching
+JIRA_CLUSTER_CF = _getenv_interned('JIRA_CLUSTER_CUSTOM_FIELD')
+JIRA_AFFECTED_COUNTRY_CF = _getenv_interned('JIRA_AFFECTED_COUNTRY_CUSTOM_FIELD')
+JIRA_REQUIRED_DATE_CF = _getenv_interned('JIRA_REQUIRED_DATE_CUSTOM_FIELD')
+JIRA_DUE_DATE_CF = _getenv_interned('JIRA_DUE_DATE_CUSTOM_FIELD', 'duedate')
 
 
 # --- LINKED RECORD CONFIGS (from .env, for resolving Airtable linked record IDs) ---
 # Users
 AIRTABLE_USERS_TABLE = os.getenv('AIRTABLE_USERS_TABLE_NAME_OR_ID')
-AIRTABLE_USERS_EMAIL_FIELD = os.getenv('AIRTABLE_USERS_EMAIL_FIELD_NAME')
+AIRTABLE_USERS_EMAIL_FIELD = _getenv_interned('AIRTABLE_USERS_EMAIL_FIELD_NAME')
 # Site
 AIRTABLE_SITE_IS_LINKED = os.getenv('AIRTABLE_SITE_FIELD_IS_LINKED', 'False').lower() == 'true'
 AIRTABLE_SITE_LINKED_TABLE = os.getenv('AIRTABLE_SITE_LINKED_TABLE_NAME_OR_ID')
-AIRTABLE_SITE_DISPLAY_FIELD = os.getenv('AIRTABLE_SITE_DISPLAY_FIELD_NAME')
+AIRTABLE_SITE_DISPLAY_FIELD = _getenv_interned('AIRTABLE_SITE_DISPLAY_FIELD_NAME')
 # Page Type
 AIRTABLE_PAGE_TYPE_IS_LINKED = os.getenv('AIRTABLE_PAGE_TYPE_FIELD_IS_LINKED', 'False').lower() == 'true'
 AIRTABLE_PAGE_TYPE_LINKED_TABLE = os.getenv('AIRTABLE_PAGE_TYPE_LINKED_TABLE_NAME_OR_ID')
-AIRTABLE_PAGE_TYPE_DISPLAY_FIELD = os.getenv('AIRTABLE_PAGE_TYPE_DISPLAY_FIELD_NAME')
+AIRTABLE_PAGE_TYPE_DISPLAY_FIELD = _getenv_interned('AIRTABLE_PAGE_TYPE_DISPLAY_FIELD_NAME')
 # Primary Metric
 AIRTABLE_PRIMARY_METRIC_IS_LINKED = os.getenv('AIRTABLE_PRIMARY_METRIC_FIELD_IS_LINKED', 'False').lower() == 'true'
 AIRTABLE_PRIMARY_METRIC_LINKED_TABLE = os.getenv('AIRTABLE_PRIMARY_METRIC_LINKED_TABLE_NAME_OR_ID')
-AIRTABLE_PRIMARY_METRIC_DISPLAY_FIELD = os.getenv('AIRTABLE_PRIMARY_METRIC_DISPLAY_FIELD_NAME')
+AIRTABLE_PRIMARY_METRIC_DISPLAY_FIELD = _getenv_interned('AIRTABLE_PRIMARY_METRIC_DISPLAY_FIELD_NAME')
 # Platform
 AIRTABLE_PLATFORM_IS_LINKED = os.getenv('AIRTABLE_PLATFORM_FIELD_IS_LINKED', 'False').lower() == 'true'
 AIRTABLE_PLATFORM_LINKED_TABLE = os.getenv('AIRTABLE_PLATFORM_LINKED_TABLE_NAME_OR_ID')
-AIRTABLE_PLATFORM_DISPLAY_FIELD = os.getenv('AIRTABLE_PLATFORM_DISPLAY_FIELD_NAME')
+AIRTABLE_PLATFORM_DISPLAY_FIELD = _getenv_interned('AIRTABLE_PLATFORM_DISPLAY_FIELD_NAME')
 # Goal (for Cluster)
 AIRTABLE_GOAL_IS_LINKED = os.getenv('AIRTABLE_GOAL_FIELD_IS_LINKED', 'False').lower() == 'true'
 AIRTABLE_GOAL_LINKED_TABLE = os.getenv('AIRTABLE_GOAL_LINKED_TABLE_NAME_OR_ID')
-AIRTABLE_GOAL_DISPLAY_FIELD = os.getenv('AIRTABLE_GOAL_DISPLAY_FIELD_NAME')
+AIRTABLE_GOAL_DISPLAY_FIELD = _getenv_interned('AIRTABLE_GOAL_DISPLAY_FIELD_NAME')
+
+# Linked-record config per main-table field name, looked up with a single dict.get().
+LinkedCfg = namedtuple('LinkedCfg', ['is_linked', 'linked_table', 'display_field'])
+_LINKED_FIELD_CFG = {
+    field_name: cfg for field_name, cfg in (
+        (AIRTABLE_COUNTRY_FIELD, LinkedCfg(AIRTABLE_SITE_IS_LINKED, AIRTABLE_SITE_LINKED_TABLE, AIRTABLE_SITE_DISPLAY_FIELD)),
+        (AIRTABLE_PAGE_TYPE_FIELD, LinkedCfg(AIRTABLE_PAGE_TYPE_IS_LINKED, AIRTABLE_PAGE_TYPE_LINKED_TABLE, AIRTABLE_PAGE_TYPE_DISPLAY_FIELD)),
+        (AIRTABLE_PRIMARY_METRIC_FIELD, LinkedCfg(AIRTABLE_PRIMARY_METRIC_IS_LINKED, AIRTABLE_PRIMARY_METRIC_LINKED_TABLE, AIRTABLE_PRIMARY_METRIC_DISPLAY_FIELD)),
+        (AIRTABLE_PLATFORM_FIELD, LinkedCfg(AIRTABLE_PLATFORM_IS_LINKED, AIRTABLE_PLATFORM_LINKED_TABLE, AIRTABLE_PLATFORM_DISPLAY_FIELD)),
+        (AIRTABLE_GOAL_FIELD, LinkedCfg(AIRTABLE_GOAL_IS_LINKED, AIRTABLE_GOAL_LINKED_TABLE, AIRTABLE_GOAL_DISPLAY_FIELD)),
+    ) if field_name
+}
 
 
 # --- MAPPINGS ---
@@ -124,9 +170,15 @@ STATUS_MAPPING_AIRTABLE_TO_JIRA = {
 STATUS_MAPPING_JIRA_TO_AIRTABLE = {v: k for k, v in STATUS_MAPPING_AIRTABLE_TO_JIRA.items()}
 # Ensure specific overrides if Jira status maps to multiple Airtable statuses
 STATUS_MAPPING_JIRA_TO_AIRTABLE["Backlog"] = "Idea: Backlog" # If new Jira issues start as "Backlog"
+# Same keys, casefolded values: the Phase 3 status comparison is case-insensitive.
+# Read-only views, since the Phase 3 workers share them.
+STATUS_MAPPING_AIRTABLE_TO_JIRA_LC = MappingProxyType({k: v.casefold() for k, v in STATUS_MAPPING_AIRTABLE_TO_JIRA.items()})
+STATUS_MAPPING_JIRA_TO_AIRTABLE_LC = MappingProxyType({k: v.casefold() for k, v in STATUS_MAPPING_JIRA_TO_AIRTABLE.items()})
 
 COUNTRY_ISO_TO_NAME = { "BE": "Belgium", "RO": "Romania", "GR": "Greece", "CZ": "Czechia", "RS": "Serbia" }
+COUNTRY_ISO_TO_NAME = {k.upper(): v for k, v in COUNTRY_ISO_TO_NAME.items()} # Keys are always upper-case; lookups try the raw code first
 COUNTRY_NAME_TO_ISO = {v: k for k, v in COUNTRY_ISO_TO_NAME.items()}
+COUNTRY_NAME_TO_ISO_LC = {k.lower(): v for k, v in COUNTRY_NAME_TO_ISO.items()} # Query with name.lower()
 
 # Mapping Airtable field variable names (from .env) to Jira Description Table display headers
 # This defines the order and content of the Jira description table.
@@ -144,6 +196,14 @@ AIRTABLE_TO_JIRA_DESC_TABLE_MAP = {
 }
 JIRA_DESC_TABLE_TO_AIRTABLE_MAP = {v: k for k, v in AIRTABLE_TO_JIRA_DESC_TABLE_MAP.items()}
 
+# Resolved once at import: (actual Airtable field name or None if not configured, Jira header) in table order.
+_DESC_TABLE_SPEC = [
+    (globals().get(var_name), jira_header)
+    for var_name, jira_header in AIRTABLE_TO_JIRA_DESC_TABLE_MAP.items()
+]
+_DESC_TABLE_FIELD_NAMES = [field_name for field_name, _ in _DESC_TABLE_SPEC if field_name]
+_JIRA_HEADER_TO_FIELD = {jira_header: field_name for field_name, jira_header in _DESC_TABLE_SPEC if field_name}
+
 # --- METADATA BLOCK FORMATTING FOR JIRA DESCRIPTION ---
 # Define clear markers for the metadata block to help with parsing.
 METADATA_BLOCK_HEADER = "--- Airtable Sync Metadata ---"
@@ -151,6 +211,64 @@ METADATA_BLOCK_FOOTER = "--- End Airtable Sync Metadata ---" # Optional, but can
 METADATA_REC_ID_PREFIX = "Airtable Record ID: "
 METADATA_EXP_ID_PREFIX = "Experiment ID: "
 METADATA_URL_PREFIX = "Airtable URL: "
+# Regex-escaped forms of the metadata constants, for building the patterns below
+_ESCAPED_HEADER = re.escape(METADATA_BLOCK_HEADER)
+_ESCAPED_REC_PREFIX = re.escape(METADATA_REC_ID_PREFIX)
+_ESCAPED_EXP_PREFIX = re.escape(METADATA_EXP_ID_PREFIX)
+_ESCAPED_URL_PREFIX = re.escape(METADATA_URL_PREFIX)
+
+# --- PRECOMPILED REGEX PATTERNS ---
+# Patterns used in per-record/per-issue helpers are compiled once here and called via .search()/.sub().
+_WXXTXX_RE = re.compile(r"([Ww]\d+[Tt]\d+)")
+_JIRA_PANEL_MACRO_RE = re.compile(r"\{panel:.*?\}")
+_JIRA_H3_HEADER_RE = re.compile(r"h3\.\s*\+\*.*?\*+\+")
+# | **Jira Header** | Value |  -> group(1) header, group(2) value
+_JIRA_DESC_ROW_RE = re.compile(r"\|\s*\*\*(.*?)\*\*.*?\s*\|\s*(.*?)\s*\|")
+# Everything from the sync metadata block to the end of a Jira description (used to strip it before rewriting).
+METADATA_BLOCK_STRIP_RE = re.compile(rf"\n\n{_ESCAPED_HEADER}.*$", re.DOTALL)
+# Metadata block lines, all three in one pass: optional leading whitespace, prefix matched at the start of any line.
+# Case-insensitivity is scoped to the prefixes/host ((?i:...)) instead of a global IGNORECASE; IDs use explicit classes.
+_METADATA_LINE_RE = re.compile(
+    rf"^\s*(?:(?i:{_ESCAPED_REC_PREFIX})(?P<rec>[Rr][Ee][Cc][a-zA-Z0-9]{{14}})"
+    rf"|(?i:{_ESCAPED_EXP_PREFIX})(?P<exp>[Ww]\d+[Tt]\d+)"
+    rf"|(?i:{_ESCAPED_URL_PREFIX})(?P<url>(?i:https://airtable\.com/)\S+))",
+    re.MULTILINE
+)
+# Lower-cased prefixes for the cheap "is there any metadata at all" check (the line pattern above matches prefixes case-insensitively).
+_METADATA_PREFIXES_LC = tuple(p.lower() for p in (METADATA_REC_ID_PREFIX, METADATA_EXP_ID_PREFIX, METADATA_URL_PREFIX))
+
+# Cell sanitization for the description tables: one str.translate pass instead of chained .replace().
+_MARKDOWN_CELL_TRANS = str.maketrans({"|": "\\|", "\n": " "})
+# Jira wiki tables have no reliable pipe escape, so pipes inside values become spaces.
+_WIKI_CELL_TRANS = str.maketrans({"|": " ", "\n": " "})
+
+# Max record IDs per OR(RECORD_ID()=...) formula, keeps the request under Airtable's URL/formula limits.
+LINKED_RECORD_BATCH_SIZE = 100
+# Max records per Airtable batch_create/batch_update request (API limit).
+AIRTABLE_WRITE_BATCH_SIZE = 10
+
+# Worker threads for resolving one record's linked fields (one per linked table)
+LINKED_RESOLVE_MAX_WORKERS = 5
+# Worker threads for independent per-issue Jira calls (e.g. transitions after a bulk create)
+JIRA_MAX_WORKERS = int(os.getenv('JIRA_MAX_WORKERS', '8'))
+
+# --- HTTP CONNECTION POOLING ---
+HTTP_POOL_SIZE = 32
+AIRTABLE_RETRY_STRATEGY = retry_strategy(total=3, backoff_factor=0.5, status_forcelist=(429, 500, 502, 503, 504))
+
+def configure_pooled_session(session, max_retries=0):
+    """
+    Mounts a keep-alive HTTPAdapter with a larger connection pool on a requests.Session,
+    so concurrent or back-to-back calls reuse TCP/TLS connections instead of re-handshaking.
+    """
+    # One kept-alive connection per concurrent worker at least, so a raised JIRA_MAX_WORKERS
+    # doesn't end up discarding connections ("Connection pool is full") and re-handshaking
+    pool_size = max(HTTP_POOL_SIZE, JIRA_MAX_WORKERS)
+    adapter = HTTPAdapter(pool_connections=pool_size, pool_maxsize=pool_size, max_retries=max_retries)
+    session.mount("https://", adapter)
+    session.mount("http://", adapter)
+    session.headers['Connection'] = 'keep-alive'
+    return session
 
 # --- GLOBAL AIRTABLE API CLIENT ---
 _airtable_api_client_global = None
@@ -159,7 +277,8 @@ def init_global_airtable_client():
     global _airtable_api_client_global
     if not _airtable_api_client_global:
         if AIRTABLE_TOKEN_CONFIG: # Use the loaded config name
-            _airtable_api_client_global = PyAirtableApi(AIRTABLE_TOKEN_CONFIG)
+            _airtable_api_client_global = PyAirtableApi(AIRTABLE_TOKEN_CONFIG, retry_strategy=AIRTABLE_RETRY_STRATEGY)
+            configure_pooled_session(_airtable_api_client_global.session, max_retries=AIRTABLE_RETRY_STRATEGY)
             logging.info("Global Airtable API client initialized.")
         else:
             logging.error("Failed to initialize global Airtable API client: Token missing from config.")
@@ -172,10 +291,59 @@ def get_global_airtable_client():
         return init_global_airtable_client()
     return _airtable_api_client_global
 
+@functools.lru_cache(maxsize=8)
+def get_airtable_table(airtable_api_token, airtable_base_id, airtable_table_name):
+    """
+    Returns a Table on a pooled keep-alive Api for (token, base, table), built once and reused by
+    every phase and every later run in the same process, so the session and its connections stick around.
+    """
+    airtable_api = PyAirtableApi(airtable_api_token, retry_strategy=AIRTABLE_RETRY_STRATEGY)
+    configure_pooled_session(airtable_api.session, max_retries=AIRTABLE_RETRY_STRATEGY)
+    return airtable_api.table(airtable_base_id, airtable_table_name)
+
+def batch_update_airtable_records(airtable_table, pending_updates, error_label="Airtable Update Failed"):
+    """
+    Writes (record_id, fields, action_details) updates with one batch_update call per AIRTABLE_WRITE_BATCH_SIZE records.
+    If a batch fails, its records are retried one update() at a time and failures are recorded on their action_details.
+    Returns the number of records that could not be updated.
+    """
+    failed_count = 0
+    for batch_start in range(0, len(pending_updates), AIRTABLE_WRITE_BATCH_SIZE):
+        batch = pending_updates[batch_start:batch_start + AIRTABLE_WRITE_BATCH_SIZE]
+        try:
+            airtable_table.batch_update([{"id": record_id, "fields": fields} for record_id, fields, _ in batch])
+            continue
+        except Exception as e:
+            logging.warning(f"    [Live] Airtable: Batch update of {len(batch)} records failed ({e}). Retrying one by one.")
+        for record_id, fields, action_details in batch:
+            try:
+                airtable_table.update(record_id, fields)
+            except Exception as e:
+                logging.error(f"    [Live] Airtable: Failed to update record {record_id}: {e}")
+                action_details["error"] = f"{error_label}: {e}"
+                failed_count += 1
+    return failed_count
+
+# --- LINKED RECORD CACHE ---
+# Resolved display values keyed by (linked_table, target_field, record_id). Dimension tables
+# (Country, Page Type, Platform, ...) rarely change, so values are kept for the whole process.
+_linked_record_cache = {}
+_linked_record_cache_lock = threading.Lock()
+
+def invalidate_linked_cache():
+    """Clears cached linked-record display values (e.g. between runs of a long-lived process)."""
+    with _linked_record_cache_lock:
+        _linked_record_cache.clear()
+
 # --- SHARED HELPER FUNCTIONS (ensure these are complete and correct from previous versions) ---
 
-def get_linked_record_display_values(record_id_list, linked_table_name_or_id, target_field_in_linked_table):
+def _is_rec_id(value):
+    # Airtable record IDs look like 'recXXXXXXXXXXXXXX'; slice compare is cheaper than startswith per element
+    return type(value) is str and value[:3] == 'rec'
+
+def get_linked_record_display_values(record_id_list, linked_table_name_or_id, target_field_in_linked_table, post_transform=None):
     # Uses get_global_airtable_client() and AIRTABLE_BASE_ID_CONFIG
+    # post_transform, if given, is applied to each resolved display value (not to unresolved IDs).
     
     client = get_global_airtable_client()
     if not client:
@@ -189,21 +357,47 @@ def get_linked_record_display_values(record_id_list, linked_table_name_or_id, ta
     display_values = []
     try:
         linked_table = client.table(AIRTABLE_BASE_ID_CONFIG, linked_table_name_or_id)
+
+        valid_ids = list(dict.fromkeys(
+            rid for rid in record_id_list if _is_rec_id(rid)
+        ))
+        fetched_values = {}
+        with _linked_record_cache_lock:
+            for rid in valid_ids:
+                cache_key = (linked_table_name_or_id, target_field_in_linked_table, rid)
+                if cache_key in _linked_record_cache:
+                    fetched_values[rid] = _linked_record_cache[cache_key]
+
+        # Fetch every uncached ID in as few requests as possible, then map back in the original order.
+        ids_to_fetch = [rid for rid in valid_ids if rid not in fetched_values]
+        failed_ids = set() # IDs whose batch request failed; already logged once per batch
+        for i in range(0, len(ids_to_fetch), LINKED_RECORD_BATCH_SIZE):
+            batch = ids_to_fetch[i:i + LINKED_RECORD_BATCH_SIZE]
+            formula = "OR(" + ",".join(f"RECORD_ID()='{rid}'" for rid in batch) + ")"
+            try:
+                for linked_record in linked_table.all(formula=formula, fields=[target_field_in_linked_table]):
+                    if target_field_in_linked_table in linked_record.get('fields', {}):
+                        fetched_values[linked_record['id']] = str(linked_record['fields'][target_field_in_linked_table])
+            except Exception as e:
+                logging.error(f"Error fetching linked records {batch} from {linked_table_name_or_id}: {e}")
+                failed_ids.update(batch)
+        if ids_to_fetch:
+            with _linked_record_cache_lock:
+                for rid in ids_to_fetch:
+                    if rid in fetched_values:
+                        _linked_record_cache[(linked_table_name_or_id, target_field_in_linked_table, rid)] = fetched_values[rid]
+
         for record_id in record_id_list:
-            
-            if not isinstance(record_id, str) or not record_id.startswith('rec'):
+            if not _is_rec_id(record_id):
                 logging.warning(f"Invalid record ID format for linked record: {record_id}")
                 display_values.append(str(record_id))
-                continue
-            try:
-                linked_record = linked_table.get(record_id)
-                if linked_record and 'fields' in linked_record and target_field_in_linked_table in linked_record['fields']:
-                    display_values.append(str(linked_record['fields'][target_field_in_linked_table]))
-                else:
-                    logging.warning(f"Target field '{target_field_in_linked_table}' not found in linked record {record_id} from table {linked_table_name_or_id}. Appending ID.")
-                    display_values.append(record_id)
-            except Exception as e:
-                logging.error(f"Error fetching linked record {record_id} from {linked_table_name_or_id}: {e}")
+            elif record_id in fetched_values:
+                value = fetched_values[record_id]
+                display_values.append(post_transform(value) if post_transform else value)
+            elif record_id in failed_ids:
+                display_values.append(record_id)
+            else:
+                logging.warning(f"Target field '{target_field_in_linked_table}' not found in linked record {record_id} from table {linked_table_name_or_id}. Appending ID.")
                 display_values.append(record_id)
         return display_values
     except Exception as e:
@@ -218,9 +412,9 @@ def get_user_emails_from_airtable(user_identifiers_list_or_str):
     actual_list = []
     
     if isinstance(user_identifiers_list_or_str, str):
-        if ',' in user_identifiers_list_or_str and not user_identifiers_list_or_str.startswith('rec'):
+        if ',' in user_identifiers_list_or_str and not _is_rec_id(user_identifiers_list_or_str):
             actual_list = [s.strip() for s in user_identifiers_list_or_str.split(',')]
-        elif user_identifiers_list_or_str.startswith('rec') and AIRTABLE_USERS_TABLE and AIRTABLE_USERS_EMAIL_FIELD:
+        elif _is_rec_id(user_identifiers_list_or_str) and AIRTABLE_USERS_TABLE and AIRTABLE_USERS_EMAIL_FIELD:
             actual_list = [user_identifiers_list_or_str]
         elif '@' in user_identifiers_list_or_str:
             return [user_identifiers_list_or_str]
@@ -233,39 +427,56 @@ def get_user_emails_from_airtable(user_identifiers_list_or_str):
         logging.warning(f"User identifier is not list or string: {user_identifiers_list_or_str}")
         return []
 
-    record_ids_to_fetch = [item for item in actual_list if isinstance(item, str) and item.startswith('rec')]
-    direct_emails = [item for item in actual_list if isinstance(item, str) and '@' in item and not item.startswith('rec')]
+    record_ids_to_fetch = [item for item in actual_list if _is_rec_id(item)]
+    if not record_ids_to_fetch:
+        # Plain list of emails (the common case): nothing to resolve against the Users table.
+        return list(dict.fromkeys(item for item in actual_list if isinstance(item, str) and '@' in item))
+    direct_emails = [item for item in actual_list if isinstance(item, str) and '@' in item and not _is_rec_id(item)]
     processed_emails = list(direct_emails)
 
-    if record_ids_to_fetch:
-        if AIRTABLE_USERS_TABLE and AIRTABLE_USERS_EMAIL_FIELD:
-            fetched_emails = get_linked_record_display_values(
-                record_ids_to_fetch, AIRTABLE_USERS_TABLE, AIRTABLE_USERS_EMAIL_FIELD
-            )
-            processed_emails.extend(email for email in fetched_emails if email and '@' in email)
-        else:
-            logging.warning("User IDs found, but Users Table/Email Field config missing for: " + ", ".join(record_ids_to_fetch))
-    return list(set(processed_emails))
+    if AIRTABLE_USERS_TABLE and AIRTABLE_USERS_EMAIL_FIELD:
+        fetched_emails = get_linked_record_display_values(
+            record_ids_to_fetch, AIRTABLE_USERS_TABLE, AIRTABLE_USERS_EMAIL_FIELD
+        )
+        processed_emails.extend(email for email in fetched_emails if email and '@' in email)
+    else:
+        logging.warning("User IDs found, but Users Table/Email Field config missing for: " + ", ".join(record_ids_to_fetch))
+    # dict.fromkeys keeps first-seen order so repeated runs produce the same list
+    return list(dict.fromkeys(processed_emails))
+
 
+# Jira accountId per lower-cased email. None is cached too, so unknown users are only searched once.
+_account_id_cache = {}
+_account_id_cache_lock = threading.Lock()
 
 def get_jira_account_id(jira_client, email_identifier):
     
     if not email_identifier or not isinstance(email_identifier, str) or '@' not in email_identifier:
         logging.warning(f"Invalid email for Jira user lookup: {email_identifier}")
         return None
+    cache_key = email_identifier.lower()
+    with _account_id_cache_lock:
+        if cache_key in _account_id_cache:
+            return _account_id_cache[cache_key]
     try:
         users = jira_client.search_users(query=email_identifier, maxResults=5)
+        account_id = None
         if users:
             for user in users:
-                if hasattr(user, 'emailAddress') and user.emailAddress and user.emailAddress.lower() == email_identifier.lower():
+                if hasattr(user, 'emailAddress') and user.emailAddress and user.emailAddress.lower() == cache_key:
                     logging.info(f"Found Jira user '{user.displayName}' (accountId: {user.accountId}) for email '{email_identifier}'.")
-                    return user.accountId
-            user = users[0]
-            logging.info(f"Found Jira user '{user.displayName}' (accountId: {user.accountId}) as best match for '{email_identifier}'.")
-            return user.accountId
+                    account_id = user.accountId
+                    break
+            else:
+                user = users[0]
+                logging.info(f"Found Jira user '{user.displayName}' (accountId: {user.accountId}) as best match for '{email_identifier}'.")
+                account_id = user.accountId
         else:
             logging.warning(f"Jira user not found for email: {email_identifier}")
-            return None
+        # Only successful searches are cached; API errors below fall through and are retried next call.
+        with _account_id_cache_lock:
+            _account_id_cache[cache_key] = account_id
+        return account_id
     except JIRAError as e:
         logging.error(f"Jira API error searching for user '{email_identifier}': {e.status_code} - {e.text}")
     except Exception as e:
@@ -273,82 +484,116 @@ def get_jira_account_id(jira_client, email_identifier):
     return None
 
 
-def format_jira_description_table_from_airtable(airtable_fields):
-
-    # This function now needs to be more dynamic based on the loaded config variables.
-    table_rows = ["| Problem or Opportunity | Answers (incl phase) |", "| :--------------------- | :------------------- |"]
-
-    # Helper to get resolved value based on loaded config
-    def get_resolved_value_for_desc(airtable_field_var_name):
-        airtable_field_name = globals().get(airtable_field_var_name) # Get field name string from the variable
-        if not airtable_field_name:
-            logging.warning(f"Airtable field name variable '{airtable_field_var_name}' not found in common_utils config.")
-            return "[CONFIG_ERROR]"
-
-        raw_value = airtable_fields.get(airtable_field_name)
-        if raw_value is None: return ""
-
-        # Determine if this field is linked and its specific linked config
-        # This requires a more structured way to access linked field configs if we iterate by AIRTABLE_TO_JIRA_DESC_TABLE_MAP keys
-        # For now, let's assume a direct mapping for simplicity in this example,
-        # but a better way would be to have a dictionary mapping airtable_field_name to its linked configs.
-        is_linked = False
-        linked_table_name = None
-        display_field_name = None
-
-        if airtable_field_name == AIRTABLE_COUNTRY_FIELD:
-            is_linked = AIRTABLE_SITE_IS_LINKED
-            linked_table_name = AIRTABLE_SITE_LINKED_TABLE
-            display_field_name = AIRTABLE_SITE_DISPLAY_FIELD
-        elif airtable_field_name == AIRTABLE_PAGE_TYPE_FIELD:
-            is_linked = AIRTABLE_PAGE_TYPE_IS_LINKED
-            linked_table_name = AIRTABLE_PAGE_TYPE_LINKED_TABLE
-            display_field_name = AIRTABLE_PAGE_TYPE_DISPLAY_FIELD
-        # ... Add similar elif for Primary Metric, Platform, Goal ...
-        elif airtable_field_name == AIRTABLE_PRIMARY_METRIC_FIELD:
-            is_linked = AIRTABLE_PRIMARY_METRIC_IS_LINKED
-            linked_table_name = AIRTABLE_PRIMARY_METRIC_LINKED_TABLE
-            display_field_name = AIRTABLE_PRIMARY_METRIC_DISPLAY_FIELD
-        elif airtable_field_name == AIRTABLE_PLATFORM_FIELD:
-            is_linked = AIRTABLE_PLATFORM_IS_LINKED
-            linked_table_name = AIRTABLE_PLATFORM_LINKED_TABLE
-            display_field_name = AIRTABLE_PLATFORM_DISPLAY_FIELD
-        elif airtable_field_name == AIRTABLE_GOAL_FIELD: # If Goal is part of description
-            is_linked = AIRTABLE_GOAL_IS_LINKED
-            linked_table_name = AIRTABLE_GOAL_LINKED_TABLE
-            display_field_name = AIRTABLE_GOAL_DISPLAY_FIELD
-
-
-        if is_linked and linked_table_name and display_field_name:
-            ids_to_resolve = []
-            if isinstance(raw_value, list) and all(isinstance(item, str) and item.startswith('rec') for item in raw_value):
-                ids_to_resolve = raw_value
-            elif isinstance(raw_value, str) and raw_value.startswith('rec'):
-                ids_to_resolve = [raw_value]
-
-            if ids_to_resolve:
-                resolved_items = get_linked_record_display_values(ids_to_resolve, linked_table_name, display_field_name)
-                if airtable_field_name == AIRTABLE_COUNTRY_FIELD: # Special: ISO to Name for display
-                    resolved_items = [COUNTRY_ISO_TO_NAME.get(item, item) for item in resolved_items]
-                return ', '.join(resolved_items) if resolved_items else f"[Unresolved: {', '.join(ids_to_resolve)}]"
-        
-        # Fallback for non-linked or if linked resolution fails/not applicable
-        return str(raw_value) if not isinstance(raw_value, list) else ', '.join(map(str, raw_value))
+def _country_iso_to_display_name(iso_code):
+    return COUNTRY_ISO_TO_NAME.get(iso_code, iso_code)
 
-    for airtable_field_var, jira_header in AIRTABLE_TO_JIRA_DESC_TABLE_MAP.items():
-        value = get_resolved_value_for_desc(airtable_field_var)
-        value_sanitized = value.replace("|", "\\|").replace("\n", " ") # Basic sanitization
-        table_rows.append(f"| **{jira_header}** | {value_sanitized} |")
-    
-    # Add Airtable Record ID and Test ID to description
-    airtable_rec_id = airtable_fields.get('id') # This is not a field, but the record object's id
-    if airtable_rec_id: # This won't be available directly in airtable_fields, need to pass record object
-        # This function should ideally take record['id'] as a separate argument if needed
-        # For now, assuming it's not directly part of the description table but added elsewhere
-        pass
 
+def _linked_ids_to_resolve(raw_value):
+    """Returns the linked record IDs held by a raw Airtable value, or [] if it is not a linked value."""
+    if isinstance(raw_value, list) and all(_is_rec_id(item) for item in raw_value):
+        return raw_value
+    if _is_rec_id(raw_value):
+        return [raw_value]
+    return []
+
+
+def _resolve_linked_desc_field(airtable_field_name, ids_to_resolve, cfg):
+    post_transform = None
+    if airtable_field_name == AIRTABLE_COUNTRY_FIELD: # Special: ISO to Name for display
+        post_transform = _country_iso_to_display_name
+    return get_linked_record_display_values(ids_to_resolve, cfg.linked_table, cfg.display_field, post_transform)
+
+
+# Shared by every resolve_all_linked_for_record call; started on first use and kept for the process,
+# so a run over many records doesn't start and join a pool per record.
+_linked_resolve_executor = None
+_linked_resolve_executor_lock = threading.Lock()
+
+def _get_linked_resolve_executor():
+    global _linked_resolve_executor
+    with _linked_resolve_executor_lock:
+        if _linked_resolve_executor is None:
+            _linked_resolve_executor = ThreadPoolExecutor(max_workers=LINKED_RESOLVE_MAX_WORKERS, thread_name_prefix="linked-resolve")
+        return _linked_resolve_executor
+
+def resolve_all_linked_for_record(airtable_fields, field_names=None):
+    """
+    Resolves the linked fields of one record concurrently (one worker per linked table).
+    Fields whose IDs are all in the linked-record cache are resolved inline; only the rest fan out.
+    Returns {field_name: [display values]} for every configured linked field holding record IDs.
+    """
+    resolved = {}
+    jobs = {}
+    for field_name in (field_names if field_names is not None else _LINKED_FIELD_CFG):
+        cfg = _LINKED_FIELD_CFG.get(field_name)
+        if cfg and cfg.is_linked and cfg.linked_table and cfg.display_field:
+            ids_to_resolve = _linked_ids_to_resolve(airtable_fields.get(field_name))
+            if not ids_to_resolve:
+                continue
+            with _linked_record_cache_lock:
+                all_cached = all((cfg.linked_table, cfg.display_field, rid) in _linked_record_cache for rid in ids_to_resolve)
+            if all_cached:
+                resolved[field_name] = _resolve_linked_desc_field(field_name, ids_to_resolve, cfg)
+            else:
+                jobs[field_name] = (ids_to_resolve, cfg)
+    if len(jobs) <= 1: # Not worth the round trip through the pool
+        resolved.update((name, _resolve_linked_desc_field(name, ids, cfg)) for name, (ids, cfg) in jobs.items())
+        return resolved
+    executor = _get_linked_resolve_executor()
+    futures = {name: executor.submit(_resolve_linked_desc_field, name, ids, cfg) for name, (ids, cfg) in jobs.items()}
+    resolved.update((name, future.result()) for name, future in futures.items())
+    return resolved
+
+
+def get_resolved_value_for_desc(airtable_fields, airtable_field_name, jira_header, resolved_linked=None):
+    """
+    Resolves one Airtable field to the display string used in a Jira description table row.
+    Linked record IDs are resolved through _LINKED_FIELD_CFG, or taken from resolved_linked
+    (see resolve_all_linked_for_record) when given; everything else is stringified.
+    """
+    if not airtable_field_name:
+        logging.warning(f"Airtable field for description row '{jira_header}' not found in common_utils config.")
+        return "[CONFIG_ERROR]"
+
+    raw_value = airtable_fields.get(airtable_field_name)
+    if raw_value is None: return ""
+
+    cfg = _LINKED_FIELD_CFG.get(airtable_field_name)
+    if cfg and cfg.is_linked and cfg.linked_table and cfg.display_field:
+        ids_to_resolve = _linked_ids_to_resolve(raw_value)
+        if ids_to_resolve:
+            if resolved_linked and airtable_field_name in resolved_linked:
+                resolved_items = resolved_linked[airtable_field_name]
+            else:
+                resolved_items = _resolve_linked_desc_field(airtable_field_name, ids_to_resolve, cfg)
+            return ', '.join(resolved_items) if resolved_items else f"[Unresolved: {', '.join(ids_to_resolve)}]"
+
+    # Fallback for non-linked or if linked resolution fails/not applicable
+    return str(raw_value) if not isinstance(raw_value, list) else ', '.join(map(str, raw_value))
+
+
+def format_jira_description_table_from_airtable(airtable_fields, wiki_markup=False):
+    """
+    Builds the Problem/Answers description table from Airtable fields.
+    Markdown by default; wiki_markup=True renders Jira's native wiki table used for new issues.
+    """
+    if wiki_markup:
+        header_rows = ["||Problem or Opportunity||Answers (incl phase)||"]
+        row_template, cell_trans = "|*{}*|{}|", _WIKI_CELL_TRANS
+    else:
+        header_rows = ["| Problem or Opportunity | Answers (incl phase) |", "| :--------------------- | :------------------- |"]
+        row_template, cell_trans = "| **{}** | {} |", _MARKDOWN_CELL_TRANS
+
+    # Fetch all linked tables for this record up front, in parallel, instead of one after another per row.
+    resolved_linked = resolve_all_linked_for_record(airtable_fields, _DESC_TABLE_FIELD_NAMES)
+    table_rows = header_rows + [
+        row_template.format(jira_header, get_resolved_value_for_desc(airtable_fields, airtable_field_name, jira_header, resolved_linked).translate(cell_trans))
+        for airtable_field_name, jira_header in _DESC_TABLE_SPEC
+    ]
+
+    # The wiki description carries the record's IDs in the metadata block instead.
     airtable_test_id_val = airtable_fields.get(AIRTABLE_TEST_ID_FIELD, "")
-    if airtable_test_id_val:
+    if airtable_test_id_val and not wiki_markup:
         table_rows.append(f"| **Airtable Test ID** | {airtable_test_id_val} |")
 
     return "\n".join(table_rows)
@@ -358,53 +603,92 @@ def parse_jira_description_table_to_airtable_fields(description_string):
 
     parsed_data = {}
     if not description_string: return parsed_data
-    # lines = description_string.splitlines()
-        # 1. Clean up Jira's special panel syntax
-    cleaned_description = re.sub(r"\{panel:.*?\}", "", description_string)
-    cleaned_description = re.sub(r"h3\.\s*\+\*.*?\*+\+", "", cleaned_description) # Remove h3 header lines
-    # 2. Use a more flexible regex to find the table rows
-    # This looks for a pipe, optional whitespace, two asterisks, the key, two asterisks,
-    # another pipe, and then captures everything until the next pipe.
-    row_pattern = re.compile(r"\|\s*\*\*(.*?)\*\*.*?\s*\|\s*(.*?)\s*\|")
-    # This parsing is fragile. It assumes a consistent two-column markdown table.
-    # | **Jira Header** | Value |
-    for match in row_pattern.finditer(cleaned_description):
-        jira_key_display = match.group(1).strip() # e.g., "1. Observation"
-        raw_value = match.group(2).strip()
-
-        # Find the corresponding Airtable field variable name from our map
-        airtable_field_var_name = JIRA_DESC_TABLE_TO_AIRTABLE_MAP.get(jira_key_display)
-        if airtable_field_var_name:
-            airtable_field_name = globals().get(airtable_field_var_name)
-            if airtable_field_name:
-                # Reverse transformations if needed
-                if airtable_field_name == AIRTABLE_COUNTRY_FIELD:
-                    parsed_data[airtable_field_name] = COUNTRY_NAME_TO_ISO.get(raw_value, raw_value)
-                else:
-                    parsed_data[airtable_field_name] = raw_value
-
-    logging.debug(f"Parsed Jira description into Airtable fields: {parsed_data}")
+    # The sync metadata block never holds table rows, so stop scanning where it starts.
+    metadata_idx = description_string.find(METADATA_BLOCK_HEADER)
+    if metadata_idx != -1:
+        description_string = description_string[:metadata_idx]
+    # 1. Clean up Jira's special panel syntax and h3 header lines
+    cleaned_description = _JIRA_PANEL_MACRO_RE.sub("", description_string)
+    cleaned_description = _JIRA_H3_HEADER_RE.sub("", cleaned_description)
+    # 2. Find the table rows. This parsing is fragile: it assumes a consistent two-column
+    # markdown table of the form | **Jira Header** | Value |
+    for match in _JIRA_DESC_ROW_RE.finditer(cleaned_description):
+        # Find the corresponding Airtable field name, e.g. "1. Observation" -> AIRTABLE_OBSERVATION_FIELD
+        airtable_field_name = _JIRA_HEADER_TO_FIELD.get(match.group(1).strip())
+        if airtable_field_name:
+            raw_value = match.group(2).strip()
+            # Reverse transformations if needed
+            if airtable_field_name == AIRTABLE_COUNTRY_FIELD:
+                parsed_data[airtable_field_name] = COUNTRY_NAME_TO_ISO_LC.get(raw_value.lower(), raw_value)
+            else:
+                parsed_data[airtable_field_name] = raw_value
+
+    if logging.getLogger().isEnabledFor(logging.DEBUG):
+        logging.debug(f"Parsed Jira description into Airtable fields: {parsed_data}")
     return parsed_data
 
 
-def find_jira_transition_id_by_name(jira_client, issue_key, target_status_name):
-    """Finds a transition ID by the target status name."""
+# Available transitions per issue: issue_key -> (fetched_at, {target status name lower: transition id}).
+# Entries expire after TRANSITIONS_CACHE_TTL_SECONDS and must be dropped once the issue is transitioned.
+# Callers that know the issue's workflow position (see jira_workflow_key) share one entry per
+# (project, issue type, current status) instead, so N issues in the same state cost one transitions() call.
+TRANSITIONS_CACHE_TTL_SECONDS = 60
+_transitions_cache = {}
+_workflow_transitions_cache = {}
+_transitions_cache_lock = threading.Lock()
+
+def invalidate_jira_transitions_cache(issue_key=None):
+    """Drops cached transitions for one issue (after it changed status), or for all issues and workflows."""
+    with _transitions_cache_lock:
+        if issue_key is None:
+            _transitions_cache.clear()
+            _workflow_transitions_cache.clear()
+        else:
+            _transitions_cache.pop(issue_key, None)
+
+def jira_workflow_key(issue):
+    """(project key, issue type, current status) of a Jira issue, or None if its fields don't carry them."""
     try:
-        transitions = jira_client.transitions(issue_key)
-        for t in transitions:
-            # The 'to' key contains a dictionary. Access its 'name' key.
-            if t['to']['name'].lower() == target_status_name.lower():
-            # -------------------------
-                return t['id']
+        fields = issue.fields
+        return (fields.project.key, fields.issuetype.name, fields.status.name)
+    except AttributeError:
+        return None
+
+def find_jira_transition_id_by_name(jira_client, issue_key, target_status_name, workflow_key=None):
+    """
+    Finds a transition ID by the target status name.
+    With workflow_key (from jira_workflow_key), the lookup is shared by all issues at the same workflow position.
+    """
+    if workflow_key:
+        cache, cache_key = _workflow_transitions_cache, workflow_key
+    else:
+        cache, cache_key = _transitions_cache, issue_key
+    try:
+        with _transitions_cache_lock:
+            cached = cache.get(cache_key)
+        if cached and time.monotonic() - cached[0] < TRANSITIONS_CACHE_TTL_SECONDS:
+            name_to_id = cached[1]
+        else:
+            name_to_id = {}
+            for t in jira_client.transitions(issue_key):
+                # The 'to' key contains a dictionary. Access its 'name' key. First match wins.
+                name_to_id.setdefault(t['to']['name'].lower(), t['id'])
+            with _transitions_cache_lock:
+                cache[cache_key] = (time.monotonic(), name_to_id)
+        transition_id = name_to_id.get(target_status_name.lower())
+        if transition_id:
+            return transition_id
         logging.warning(f"No transition found to target status '{target_status_name}' for issue {issue_key}.")
     except JIRAError as e:
         logging.error(f"Error fetching transitions for {issue_key}: {e}")
     return None
 
 
+# Pure regex over the summary, and the same summaries come through every phase and run
+@functools.lru_cache(maxsize=4096)
 def get_experiment_wxx_txx_id(text_string):
     if not text_string: return None
-    match = re.search(r"(W\d+T\d+)", text_string, re.IGNORECASE)
+    match = _WXXTXX_RE.search(text_string)
     return match.group(1).upper() if match else None
 
 
@@ -426,10 +710,19 @@ def construct_jira_headline(exp_id, country_iso, page_type_val, name_val):
     return headline
 
 
+# Records share planning dates a lot, so each distinct string is only parsed once per run
+@functools.lru_cache(maxsize=1024)
 def format_date_for_jira(date_str):
 
     if not date_str: return None
     try:
+        # Fast path: Airtable's 'YYYY-MM-DD' and 'YYYY-MM-DDTHH:MM:SS.sssZ' both start with the date Jira wants.
+        # date.fromisoformat rejects impossible dates (2024-02-30); the round-trip check keeps out the other
+        # ISO spellings it accepts (e.g. week dates), which fall through to the checks below.
+        if len(date_str) == 10 or date_str[10:11] == 'T':
+            date_prefix = date_str[:10]
+            if date.fromisoformat(date_prefix).isoformat() == date_prefix:
+                return date_prefix
         # Handle Airtable's format 'YYYY-MM-DDTHH:MM:SS.sssZ' or simple 'YYYY-MM-DD'
         if 'T' in date_str:
             dt_obj = datetime.fromisoformat(date_str.replace('Z', '+00:00'))
@@ -450,6 +743,9 @@ def format_date_for_airtable(date_str):
     # Airtable Date field (without time) accepts 'YYYY-MM-DD'
     if not date_str: return None
     try:
+        # Dates parsed from Jira descriptions land here too, so the calendar date is always validated
+        if len(date_str) == 10 and date.fromisoformat(date_str).isoformat() == date_str:
+            return date_str
         datetime.strptime(date_str, '%Y-%m-%d') # Validate it's YYYY-MM-DD
         return date_str
     except ValueError:
@@ -478,91 +774,37 @@ def add_comment_to_airtable(airtable_client, record_id, new_comment_text):
         logging.error(f"Failed to add comment to Airtable record {record_id}. Error: {e}")
 
 
-def format_full_jira_description(airtable_record_id, airtable_fields, airtable_base_id_for_url, airtable_table_id_or_name_for_url):
+def _build_description_preamble(airtable_base_id_for_url, airtable_table_id_or_name_for_url):
     """
-    Formats the entire Jira description using Jira's native wiki-style table format.
+    Builds the static parts of the metadata block: the header line and the record URL stem
+    (None if the base/table aren't known). These only depend on the base/table, not the record.
     """
-    table_rows = ["||Problem or Opportunity||Answers (incl phase)||"]
-    
-    def get_resolved_value_for_desc(airtable_field_var_name_str, fields_dict):
-        """
-        Internal helper to resolve values for the description table.
-        This now correctly accepts two arguments.
-        """
-        airtable_field_name = globals().get(airtable_field_var_name_str)
-        if not airtable_field_name:
-            logging.warning(f"Config variable '{airtable_field_var_name_str}' not found.")
-            return "[CONFIG_ERROR]"
-        
-        # This logic dynamically checks the linked status based on the field name variable.
-        # It constructs the name of the config flags (e.g., AIRTABLE_SITE_IS_LINKED from AIRTABLE_COUNTRY_FIELD)
-        raw_value = airtable_fields.get(airtable_field_name)
-        if raw_value is None: return ""
-        
-        is_linked = globals().get(f"{airtable_field_var_name_str.replace('_FIELD', '')}_IS_LINKED", False)
-        linked_table = globals().get(f"{airtable_field_var_name_str.replace('_FIELD', '')}_LINKED_TABLE")
-        display_field = globals().get(f"{airtable_field_var_name_str.replace('_FIELD', '')}_DISPLAY_FIELD")
-        
-        # Dynamically check linked status based on the field name
-        # This requires a mapping or a series of if/elifs for each configurable linked field
-        if airtable_field_name == AIRTABLE_COUNTRY_FIELD:
-            is_linked = AIRTABLE_SITE_IS_LINKED # Using SITE for COUNTRY field linkage
-            linked_table_name = AIRTABLE_SITE_LINKED_TABLE
-            display_field_name = AIRTABLE_SITE_DISPLAY_FIELD
-        elif airtable_field_name == AIRTABLE_PAGE_TYPE_FIELD:
-            is_linked = AIRTABLE_PAGE_TYPE_IS_LINKED
-            linked_table_name = AIRTABLE_PAGE_TYPE_LINKED_TABLE
-            display_field_name = AIRTABLE_PAGE_TYPE_DISPLAY_FIELD
-        elif airtable_field_name == AIRTABLE_PRIMARY_METRIC_FIELD:
-            is_linked = AIRTABLE_PRIMARY_METRIC_IS_LINKED
-            linked_table_name = AIRTABLE_PRIMARY_METRIC_LINKED_TABLE
-            display_field_name = AIRTABLE_PRIMARY_METRIC_DISPLAY_FIELD
-        elif airtable_field_name == AIRTABLE_PLATFORM_FIELD:
-            is_linked = AIRTABLE_PLATFORM_IS_LINKED
-            linked_table_name = AIRTABLE_PLATFORM_LINKED_TABLE
-            display_field_name = AIRTABLE_PLATFORM_DISPLAY_FIELD
-        elif airtable_field_name == AIRTABLE_GOAL_FIELD:
-            is_linked = AIRTABLE_GOAL_IS_LINKED
-            linked_table_name = AIRTABLE_GOAL_LINKED_TABLE
-            display_field_name = AIRTABLE_GOAL_DISPLAY_FIELD
-        
-        if is_linked and linked_table_name and display_field_name:
-            ids_to_resolve = []
-            if isinstance(raw_value, list) and all(isinstance(item, str) and item.startswith('rec') for item in raw_value):
-                ids_to_resolve = raw_value
-            elif isinstance(raw_value, str) and raw_value.startswith('rec'):
-                ids_to_resolve = [raw_value]
-
-            if ids_to_resolve:
-                resolved_items = get_linked_record_display_values(ids_to_resolve, linked_table_name, display_field_name)
-                if airtable_field_name == AIRTABLE_COUNTRY_FIELD:
-                    resolved_items = [COUNTRY_ISO_TO_NAME.get(item, item) for item in resolved_items]
-                return ', '.join(resolved_items) if resolved_items else f"[Unresolved: {', '.join(ids_to_resolve)}]"
-        
-        return str(raw_value) if not isinstance(raw_value, list) else ', '.join(map(str, raw_value))
+    url_stem = None
+    if airtable_base_id_for_url and airtable_table_id_or_name_for_url:
+        url_stem = f"{METADATA_URL_PREFIX}https://airtable.com/{airtable_base_id_for_url}/{airtable_table_id_or_name_for_url}/"
+    return f"\n\n{METADATA_BLOCK_HEADER}", url_stem
 
-    for airtable_field_var, jira_header in AIRTABLE_TO_JIRA_DESC_TABLE_MAP.items():
-        value = get_resolved_value_for_desc(airtable_field_var, airtable_fields) # Pass airtable_fields
-        # Sanitize value for wiki table (Jira escapes | with ||, but it's safer to avoid them)
-        value_sanitized = value.replace("|", " ").replace("\n", " ")
-        # The key is now bolded with asterisks, which Jira wiki markup understands
-        table_rows.append(f"|*{jira_header}*|{value_sanitized}|")
+# Same base/table for every record in a run, so the preamble is built once
+_get_description_preamble = functools.lru_cache(maxsize=4)(_build_description_preamble)
 
-    main_description_table = "\n".join(table_rows)
+def format_full_jira_description(airtable_record_id, airtable_fields, airtable_base_id_for_url, airtable_table_id_or_name_for_url):
+    """
+    Formats the entire Jira description using Jira's native wiki-style table format.
+    """
+    main_description_table = format_jira_description_table_from_airtable(airtable_fields, wiki_markup=True)
 
-    metadata_lines = [f"\n\n{METADATA_BLOCK_HEADER}"]
+    metadata_header, url_stem = _get_description_preamble(airtable_base_id_for_url, airtable_table_id_or_name_for_url)
+    metadata_lines = [metadata_header]
     if airtable_record_id: metadata_lines.append(f"{METADATA_REC_ID_PREFIX}{airtable_record_id}")
     experiment_id = airtable_fields.get(AIRTABLE_EXPERIMENT_ID_FIELD)
     if experiment_id: metadata_lines.append(f"{METADATA_EXP_ID_PREFIX}{experiment_id}")
-    if airtable_record_id and airtable_base_id_for_url and airtable_table_id_or_name_for_url:
-        airtable_url = f"https://airtable.com/{airtable_base_id_for_url}/{airtable_table_id_or_name_for_url}/{airtable_record_id}"
-        metadata_lines.append(f"{METADATA_URL_PREFIX}{airtable_url}")
+    if airtable_record_id and url_stem:
+        metadata_lines.append(f"{url_stem}{airtable_record_id}")
 
     if len(metadata_lines) > 1:
         return main_description_table + "\n".join(metadata_lines)
     else:
         return main_description_table
-    # --- End of format_jira_description_table_from_airtable logic ---
 
 
 
@@ -579,29 +821,26 @@ def parse_metadata_from_jira_description(description_string):
     }
     if not description_string:
         return metadata
+    # Most descriptions (e.g. issues created directly in Jira) carry no metadata; skip the regex scans for those.
+    description_lc = description_string.lower()
+    if not any(prefix in description_lc for prefix in _METADATA_PREFIXES_LC):
+        return metadata
 
-    # Regex patterns that allow for optional leading whitespace (`\s*`)
-    # and look for the prefix anywhere in a line (`re.MULTILINE`).
-    rec_id_pattern = rf"^\s*{re.escape(METADATA_REC_ID_PREFIX)}(rec[a-zA-Z0-9]{{14}})"
-    exp_id_pattern = rf"^\s*{re.escape(METADATA_EXP_ID_PREFIX)}(W\d+T\d+)"
-    url_pattern = rf"^\s*{re.escape(METADATA_URL_PREFIX)}(https://airtable\.com/\S+)"
-
-    rec_id_match = re.search(rec_id_pattern, description_string, re.MULTILINE | re.IGNORECASE)
-    if rec_id_match:
-        metadata['airtable_record_id'] = rec_id_match.group(1)
-
-    exp_id_match = re.search(exp_id_pattern, description_string, re.MULTILINE | re.IGNORECASE)
-    if exp_id_match:
-        metadata['experiment_id'] = exp_id_match.group(1).upper()
-
-    url_match = re.search(url_pattern, description_string, re.MULTILINE | re.IGNORECASE)
-    if url_match:
-        metadata['airtable_url'] = url_match.group(1)
+    # First occurrence of each line wins, as with separate searches.
+    for match in _METADATA_LINE_RE.finditer(description_string):
+        rec_id, exp_id, url = match.group('rec', 'exp', 'url')
+        if rec_id and not metadata['airtable_record_id']:
+            metadata['airtable_record_id'] = rec_id
+        elif exp_id and not metadata['experiment_id']:
+            metadata['experiment_id'] = exp_id.upper()
+        elif url and not metadata['airtable_url']:
+            metadata['airtable_url'] = url
     
-    if metadata['airtable_record_id']: # Log if we found the most important piece
-        logging.debug(f"Parsed metadata from Jira description: {metadata}")
-    else:
-        logging.debug("No Airtable Record ID metadata found or parsed from Jira description.")
+    if logging.getLogger().isEnabledFor(logging.DEBUG): # skip formatting the dict at normal log levels
+        if metadata['airtable_record_id']: # Log if we found the most important piece
+            logging.debug(f"Parsed metadata from Jira description: {metadata}")
+        else:
+            logging.debug("No Airtable Record ID metadata found or parsed from Jira description.")
         
     return metadata
 
@@ -628,12 +867,7 @@ def get_resolved_value_for_sync(raw_value, is_linked_config, linked_table_config
         return None
     
     if is_linked_config and linked_table_config and display_field_config:
-        ids_to_resolve = []
-        if isinstance(raw_value, list) and all(isinstance(item, str) and item.startswith('rec') for item in raw_value):
-            ids_to_resolve = raw_value
-        elif isinstance(raw_value, str) and raw_value.startswith('rec'):
-            ids_to_resolve = [raw_value]
-
+        ids_to_resolve = _linked_ids_to_resolve(raw_value)
         if ids_to_resolve:
             resolved_items = get_linked_record_display_values(ids_to_resolve, linked_table_config, display_field_config)
             # Return the first item for single-value fields, or a joined string for multi-value
@@ -644,4 +878,24 @@ def get_resolved_value_for_sync(raw_value, is_linked_config, linked_table_config
         return ', '.join(map(str, raw_value)) if raw_value else None
     return str(raw_value)
 
+# --- STRUCTURED SYNC ACTIONS ---
+# Phase 2 records its actions as {"step", "status", "detail"} dicts (extra keys allowed) instead of
+# ready-made sentences; the text is only rendered when a report is written.
+SYNC_ACTION_TEMPLATES = {
+    ("jira_create", "planned"): "Jira: Plan to create issue with summary '{detail}'.",
+    ("jira_transition", "planned"): "Jira: Plan to set status of new issue to '{detail}'.",
+    ("jira_transition", "error"): "Jira: Failed to set status to '{target_status}': {detail}",
+    ("airtable_update", "planned"): "Airtable: Plan to update record {detail} with Jira key.",
+    ("airtable_update", "skipped"): "Airtable: Update is disabled by flag or Jira issue not created.",
+}
+
+def format_sync_action(action_entry):
+    """Renders one entry of an action_details["actions"] list. Plain strings (Phases 1 and 3) pass through."""
+    if isinstance(action_entry, str):
+        return action_entry
+    template = SYNC_ACTION_TEMPLATES.get((action_entry.get("step"), action_entry.get("status")))
+    if template is None:
+        return f"{action_entry.get('step')} ({action_entry.get('status')}): {action_entry.get('detail', '')}"
+    return template.format_map(action_entry)
+
 # --- END OF common_utils.py ---
\ No newline at end of file
@@ -2,52 +2,72 @@
 import os
 import logging # Basic logging for this initial check
 import re
-from dotenv import load_dotenv, find_dotenv # Ensure find_dotenv is imported
+from dotenv import dotenv_values, find_dotenv # Ensure find_dotenv is imported
 
 # --- Import the phase-specific run function ---
 from phase1_jira_to_airtable import run_phase1
 from phase2_airtable_to_jira import run_phase2
 from phase3_two_way_sync import run_phase3
 from qa_report import generate_qa_summary_table
+from common_utils import DOTENV_PATH_LOADED # The .env common_utils already loaded on import, if any
 
 
 # --- Initial .env check BEFORE anything else ---
 # This block should be the very first executable code.
-# Configure basic logging just for this part, will be reconfigured later.
+# Uses its own console logger so the root logger is configured only once, below.
 _initial_log_format = '%(asctime)s - %(levelname)s - [INITIAL_CHECK] - %(message)s'
-logging.basicConfig(level=logging.INFO, format=_initial_log_format, handlers=[logging.StreamHandler()])
+_initial_logger = logging.getLogger('initial_check')
+_initial_handler = logging.StreamHandler()
+_initial_handler.setFormatter(logging.Formatter(_initial_log_format))
+_initial_logger.addHandler(_initial_handler)
+_initial_logger.setLevel(logging.INFO)
+_initial_logger.propagate = False
 
-logging.info(f"Script execution started. Python's CWD: {os.getcwd()}")
+_initial_logger.info(f"Script execution started. Python's CWD: {os.getcwd()}")
 
 # Attempt to find and load .env
 # find_dotenv() searches for .env in current and parent directories.
 # It returns the path to .env if found, or None.
 dotenv_path = find_dotenv(usecwd=True) # Prioritize CWD
 
-
+def _load_missing_env_values(path):
+    """
+    Parses the .env at path once and sets only the keys not already in os.environ (like load_dotenv(override=False)).
+    Returns False if it held no values.
+    """
+    env_values = dotenv_values(path)
+    for key, value in env_values.items():
+        if value is not None:
+            os.environ.setdefault(key, value)
+    return bool(env_values)
 
 if dotenv_path and os.path.exists(dotenv_path):
-    logging.info(f".env file found by find_dotenv() at: {dotenv_path}")
-    if load_dotenv(dotenv_path):
-        logging.info("SUCCESS: .env file was explicitly loaded.")
+    _initial_logger.info(f".env file found by find_dotenv() at: {dotenv_path}")
+    if os.path.abspath(dotenv_path) == DOTENV_PATH_LOADED:
+        # The phase imports above pull in common_utils, which loaded this same file next to the scripts
+        _initial_logger.info("SUCCESS: .env file was already loaded by common_utils. Skipping re-parse.")
+    elif _load_missing_env_values(dotenv_path):
+        _initial_logger.info("SUCCESS: .env file was explicitly loaded.")
     else:
-        logging.warning("WARNING: load_dotenv() called with a path but returned False (might indicate an empty .env or other issue).")
+        _initial_logger.warning("WARNING: .env file found but no values were loaded from it (might indicate an empty .env or other issue).")
 elif os.path.exists(os.path.join(os.getcwd(), '.env')):
     # Fallback if find_dotenv with usecwd=True didn't work but it's directly in CWD
     dotenv_path = os.path.join(os.getcwd(), '.env')
-    logging.info(f".env file found directly in CWD: {dotenv_path}")
-    if load_dotenv(dotenv_path):
-        logging.info("SUCCESS: .env file was explicitly loaded from CWD.")
+    _initial_logger.info(f".env file found directly in CWD: {dotenv_path}")
+    if os.path.abspath(dotenv_path) == DOTENV_PATH_LOADED:
+        _initial_logger.info("SUCCESS: .env file was already loaded by common_utils. Skipping re-parse.")
+    elif _load_missing_env_values(dotenv_path):
+        _initial_logger.info("SUCCESS: .env file was explicitly loaded from CWD.")
     else:
-        logging.warning("WARNING: load_dotenv() called with CWD path but returned False.")
+        _initial_logger.warning("WARNING: .env file found in CWD but no values were loaded from it.")
 else:
-    logging.error("CRITICAL: .env file NOT found in current working directory or parent directories by find_dotenv().")
-    logging.error(f"Please ensure '.env' exists in: {os.getcwd()} or its parent directories if not using usecwd=True.")
+    _initial_logger.error("CRITICAL: .env file NOT found in current working directory or parent directories by find_dotenv().")
+    _initial_logger.error(f"Please ensure '.env' exists in: {os.getcwd()} or its parent directories if not using usecwd=True.")
     # Optionally, list files in CWD for debugging from Python's perspective:
     try:
-        logging.info(f"Files in CWD ({os.getcwd()}): {os.listdir(os.getcwd())}")
+        _initial_logger.info(f"Files in CWD ({os.getcwd()}): {os.listdir(os.getcwd())}")
     except Exception as e:
-        logging.error(f"Could not list files in CWD: {e}")
+        _initial_logger.error(f"Could not list files in CWD: {e}")
     # Exit here if .env is absolutely critical and not found
     # exit() # Uncomment if you want to stop if .env is not found
 
@@ -57,31 +77,36 @@ jira_url_val = os.getenv('JIRA_SERVER_URL')
 jira_user_val = os.getenv('JIRA_USERNAME')
 jira_token_val = os.getenv('JIRA_API_TOKEN')
 
-logging.info(f"DEBUG CHECK - JIRA_SERVER_URL: '{jira_url_val}' (Type: {type(jira_url_val)})")
-logging.info(f"DEBUG CHECK - JIRA_USERNAME: '{jira_user_val}' (Type: {type(jira_user_val)})")
+_initial_logger.info(f"DEBUG CHECK - JIRA_SERVER_URL: '{jira_url_val}' (Type: {type(jira_url_val)})")
+_initial_logger.info(f"DEBUG CHECK - JIRA_USERNAME: '{jira_user_val}' (Type: {type(jira_user_val)})")
 if jira_token_val:
-    logging.info(f"DEBUG CHECK - JIRA_API_TOKEN: '********{jira_token_val[-4:] if len(jira_token_val) > 4 else '****'}' (Loaded: True, Length: {len(jira_token_val)})")
+    _initial_logger.info(f"DEBUG CHECK - JIRA_API_TOKEN: '********{jira_token_val[-4:] if len(jira_token_val) > 4 else '****'}' (Loaded: True, Length: {len(jira_token_val)})")
 else:
-    logging.info("DEBUG CHECK - JIRA_API_TOKEN: Not loaded or empty.")
+    _initial_logger.info("DEBUG CHECK - JIRA_API_TOKEN: Not loaded or empty.")
 
 # --- Now, proceed with other imports and the rest of the script ---
-# The main logging will be reconfigured after common_utils is imported.
+# The main logging is configured after common_utils is imported.
 import common_utils # common_utils will also try to load .env, which is fine.
 from jira import JIRA
-from pyairtable import Api as PyAirtableApi
 
-# --- Main Logging Reconfiguration (as it was before) ---
+# --- Main Logging Configuration ---
 LOG_FILE_PATH = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'airtable_jira_sync.log')
-logging.basicConfig( # This reconfigures, replacing the initial basicConfig
+logging.basicConfig( # The only root logging configuration (the initial check above has its own logger)
     level=common_utils.LOG_LEVEL,
     format='%(asctime)s - %(levelname)s - [%(module)s.%(funcName)s:%(lineno)d] - %(message)s',
     handlers=[
         logging.FileHandler(LOG_FILE_PATH, mode='a'),
         logging.StreamHandler()
-    ],
-    force=True # Force reconfiguration of logging
+    ]
 )
-logging.info("Main logging reconfigured.") # Test message for new config
+logging.info("Main logging configured.")
+
+# Jira issue key as stored in Airtable, e.g. "CRO-123" (compiled once; checked per Airtable record).
+_JIRA_KEY_RE = re.compile(r"^[A-Z][A-Z0-9]+-\d+$")
+
+# Jira search paging; fields are limited to what the phases and QA report actually read.
+JIRA_SEARCH_PAGE_SIZE = 100
+JIRA_SEARCH_FIELDS = "summary,description,status,labels,updated,project,issuetype" # project/issuetype: transition cache key
 
 # ... (rest of the main_controller.py: initialize_clients, fetch_all_data, build_initial_mappings, main function) ...
 # Ensure the definitions of initialize_clients, fetch_all_data, etc. are below this point.
@@ -98,18 +123,20 @@ def initialize_clients():
         logging.critical("Failed to initialize Airtable client (via global common_utils). Exiting.")
         return None, None
     try:
-        # These are already loaded by the initial block
-        jira_url = os.getenv('JIRA_SERVER_URL')
-        jira_user = os.getenv('JIRA_USERNAME')
-        jira_token = os.getenv('JIRA_API_TOKEN')
-
-        if not all([jira_url, jira_user, jira_token]):
+        # These were already read by the initial block at import (jira_*_val)
+        if not all([jira_url_val, jira_user_val, jira_token_val]):
             logging.critical("Jira connection details are None after initial load. Check .env content and names.")
             return None, None
         
-        jira_client_instance = JIRA(server=jira_url, basic_auth=(jira_user, jira_token))
-        jira_client_instance.myself()
-        logging.info(f"Successfully connected to Jira server: {jira_url}")
+        jira_client_instance = JIRA(server=jira_url_val, basic_auth=(jira_user_val, jira_token_val))
+        # Larger keep-alive pool for the concurrent phase work; the jira ResilientSession does its own retries.
+        common_utils.configure_pooled_session(jira_client_instance._session)
+        if common_utils.SCRIPT_DEBUG_MODE:
+            # Extra round-trip just to validate credentials up front; otherwise bad creds surface on the first search.
+            jira_client_instance.myself()
+            logging.info(f"Successfully connected to Jira server: {jira_url_val}")
+        else:
+            logging.info(f"Jira client created for server: {jira_url_val}")
         return jira_client_instance, airtable_api_global_client
     except Exception as e:
         logging.critical(f"Failed to connect to Jira in initialize_clients: {e}. Exiting.")
@@ -118,44 +145,66 @@ def initialize_clients():
 # ... (define fetch_all_data, build_initial_mappings, and main_logic here) ...
 
 def fetch_all_data(jira_client_instance, airtable_api_token_for_direct_call, airtable_base_id_for_direct_call, airtable_table_name_for_direct_call):
-    all_jira_issues = []
+    # Returns ({jira_key: issue} in JQL order, [airtable records]).
+    all_jira_issues_by_key = {}
     all_airtable_records = []
     try:
         jql = f"project = '{common_utils.JIRA_PROJECT_KEY_CONFIG}' AND labels = '{common_utils.JIRA_CRO_LABEL}' ORDER BY created DESC"
         logging.info(f"Fetching Jira issues with JQL: {jql}")
-        issues_batch = jira_client_instance.search_issues(jql, startAt=0, maxResults=500)
-        all_jira_issues.extend(issues_batch)
-        logging.info(f"Fetched {len(all_jira_issues)} Jira issues.")
+        start_at = 0
+        while True:
+            issues_batch = jira_client_instance.search_issues(
+                jql, startAt=start_at, maxResults=JIRA_SEARCH_PAGE_SIZE, fields=JIRA_SEARCH_FIELDS
+            )
+            if not issues_batch:
+                break
+            for issue in issues_batch:
+                all_jira_issues_by_key[issue.key] = issue
+            start_at += len(issues_batch)
+            # Jira may return fewer than maxResults per page (server-side caps), so only the total says when we're done
+            if start_at >= issues_batch.total:
+                break
+        logging.info(f"Fetched {len(all_jira_issues_by_key)} Jira issues.")
     except Exception as e:
         logging.error(f"Failed to fetch Jira issues: {e}")
     try:
         if airtable_api_token_for_direct_call and airtable_base_id_for_direct_call and airtable_table_name_for_direct_call:
-            temp_airtable_api = PyAirtableApi(airtable_api_token_for_direct_call)
-            airtable_main_table = temp_airtable_api.table(airtable_base_id_for_direct_call, airtable_table_name_for_direct_call)
-            all_airtable_records = airtable_main_table.all()
+            # Same cached pooled table (retry policy, keep-alive session) the phases get, so the fetch warms its connections
+            airtable_main_table = common_utils.get_airtable_table(
+                airtable_api_token_for_direct_call, airtable_base_id_for_direct_call, airtable_table_name_for_direct_call
+            )
+            try:
+                # Only the fields the sync reads; the table has many more (attachments, long text, lookups).
+                all_airtable_records = airtable_main_table.all(fields=common_utils.AIRTABLE_MAIN_TABLE_FIELDS)
+            except Exception as e:
+                # e.g. 422 UNKNOWN_FIELD_NAME when a configured field name doesn't exist in the table
+                logging.warning(f"Projected Airtable fetch failed ({e}). Falling back to fetching all fields.")
+                all_airtable_records = airtable_main_table.all()
             logging.info(f"Fetched {len(all_airtable_records)} Airtable records.")
         else:
             logging.error("Airtable connection details missing for fetching all records.")
     except Exception as e:
         logging.error(f"Failed to fetch Airtable records: {e}")
-    return all_jira_issues, all_airtable_records
+    return all_jira_issues_by_key, all_airtable_records
+
+def extract_airtable_jira_keys(all_airtable_records):
+    """Compact [(record_id, raw Jira key field value)] for the records that have a Jira key at all."""
+    jira_key_field = common_utils.AIRTABLE_JIRA_KEY_FIELD
+    return [(record['id'], raw_key) for record in all_airtable_records if (raw_key := record['fields'].get(jira_key_field))]
 
-def build_initial_mappings(all_jira_issues, all_airtable_records):
+def build_initial_mappings(all_jira_issues, airtable_jira_key_pairs):
+    # airtable_jira_key_pairs comes from extract_airtable_jira_keys (records without a key are already dropped)
     jira_key_to_airtable_id = {}
     airtable_id_to_jira_key = {}
-    for record in all_airtable_records:
-        record_id = record['id']
-        airtable_fields = record['fields']
-        jira_key_from_airtable = airtable_fields.get(common_utils.AIRTABLE_JIRA_KEY_FIELD)
-        if jira_key_from_airtable and re.match(r"^[A-Z][A-Z0-9]+-\d+$", jira_key_from_airtable.strip()):
-            jira_key = jira_key_from_airtable.strip()
-            if jira_key in jira_key_to_airtable_id and jira_key_to_airtable_id[jira_key] != record_id:
+    debug_enabled = logging.getLogger().isEnabledFor(logging.DEBUG)
+    for record_id, jira_key_from_airtable in airtable_jira_key_pairs:
+        if (jira_key := jira_key_from_airtable.strip()) and _JIRA_KEY_RE.match(jira_key):
+            if (mapped_record_id := jira_key_to_airtable_id.setdefault(jira_key, record_id)) != record_id:
                 logging.warning(f"Conflict: Jira key {jira_key} in Airtable record {record_id} "
-                                f"is already mapped to Airtable record {jira_key_to_airtable_id[jira_key]}.")
+                                f"is already mapped to Airtable record {mapped_record_id}.")
             else:
-                jira_key_to_airtable_id[jira_key] = record_id
                 airtable_id_to_jira_key[record_id] = jira_key
-        elif jira_key_from_airtable:
+        elif debug_enabled:
              # Log that we are ignoring placeholder text
              logging.debug(f"Ignoring invalid or placeholder text in Jira Key field for Airtable record {record_id}: '{jira_key_from_airtable}'")
     for issue in all_jira_issues:
@@ -190,19 +239,19 @@ def main_logic():
     airtable_main_table_name_for_bulk = os.getenv('AIRTABLE_TABLE_NAME')
 
     # 1. Fetch all raw data
-    all_jira_issues_raw, all_airtable_records_raw = fetch_all_data(
+    jira_issues_map_by_key, all_airtable_records_raw = fetch_all_data(
         jira_client_instance, airtable_token_for_bulk, airtable_base_id_for_bulk, airtable_main_table_name_for_bulk
     )
+    all_jira_issues_raw = list(jira_issues_map_by_key.values())
     
     # 2. Create lookup maps for easier access
     
-    jira_issues_map_by_key = {issue.key: issue for issue in all_jira_issues_raw}
     airtable_records_map_by_id = {record['id']: record for record in all_airtable_records_raw}
     logging.info(f"Created lookup maps: {len(jira_issues_map_by_key)} Jira issues, {len(airtable_records_map_by_id)} Airtable records.")
 
     # 3. Build initial mappings (Jira Key <-> Airtable Record ID)
     jira_key_to_airtable_id_map, airtable_id_to_jira_key_map = build_initial_mappings(
-        all_jira_issues_raw, all_airtable_records_raw
+        all_jira_issues_raw, extract_airtable_jira_keys(all_airtable_records_raw)
     )
 
     overall_actions_log = []
@@ -210,10 +259,15 @@ def main_logic():
     # --- Execute Phases ---
     if common_utils.ENABLE_PHASE1:
         logging.info("--- Starting Phase 1: New Jira Issues to Airtable ---")
+        # Only issues with no Airtable link yet (one set difference instead of a per-issue check in Phase 1)
+        unlinked_keys = jira_issues_map_by_key.keys() - jira_key_to_airtable_id_map.keys()
+        unlinked_keys.discard(common_utils.JIRA_CRO_INTAKE_FORM_KEY)
+        unlinked_jira_issues = [issue for key, issue in jira_issues_map_by_key.items() if key in unlinked_keys] # keeps JQL order
+        logging.info(f"Phase 1: {len(unlinked_jira_issues)} unlinked Jira issues to process.")
         actions_phase1 = run_phase1(
             jira_client_instance,
             airtable_token_for_bulk, airtable_base_id_for_bulk, airtable_main_table_name_for_bulk,
-            all_jira_issues_raw,
+            unlinked_jira_issues,
             airtable_id_to_jira_key_map,
             jira_key_to_airtable_id_map
         )
@@ -1,9 +1,37 @@
 # phase1_jira_to_airtable.py
 import logging
-import json
-import re
+from concurrent.futures import ThreadPoolExecutor
 import common_utils
-from pyairtable import Api as PyAirtableApi
+
+def _create_airtable_records(airtable_table, batch):
+    """
+    Creates the Airtable records for a batch of pending Phase 1 entries with one batch_create call.
+    Falls back to one create() per record if the batch call fails, so a single bad record
+    doesn't sink the others. Returns the created record IDs (None for failures), aligned with batch.
+    """
+    try:
+        created_records = airtable_table.batch_create([fields for _, _, fields, _, _ in batch])
+        created_ids = [record['id'] for record in created_records]
+        for (_, action_details, _, _, _), created_id in zip(batch, created_ids):
+            logging.info(f"    [Live] Airtable: Created record {created_id} for Jira issue {action_details['jira_key']}.")
+            action_details["actions"][-1] = f"Airtable: Successfully created record." # Cleaned up message
+        return created_ids
+    except Exception as e:
+        logging.warning(f"    [Live] Airtable: Batch create of {len(batch)} records failed ({e}). Retrying one by one.")
+
+    created_ids = []
+    for _, action_details, fields, _, _ in batch:
+        jira_key = action_details["jira_key"]
+        try:
+            created_id = airtable_table.create(fields)['id']
+            logging.info(f"    [Live] Airtable: Created record {created_id} for Jira issue {jira_key}.")
+            action_details["actions"][-1] = f"Airtable: Successfully created record." # Cleaned up message
+        except Exception as e:
+            logging.error(f"    [Live] Airtable: Failed to create record for Jira issue {jira_key}: {e}")
+            action_details["error"] = f"Airtable Create Failed: {e}"
+            created_id = None
+        created_ids.append(created_id)
+    return created_ids
 
 def run_phase1(jira_client, airtable_api_token, airtable_base_id, airtable_table_name,
                all_jira_issues_list,
@@ -15,63 +43,71 @@ def run_phase1(jira_client, airtable_api_token, airtable_base_id, airtable_table
     - Updates Jira issue title and status.
     - Creates a corresponding record in Airtable.
     - Updates the Jira issue description with the new Airtable Record ID metadata.
+    all_jira_issues_list should hold only unlinked issues (main_logic drops linked ones and the intake form).
     """
     logging.info("--- Executing Phase 1: New Jira Issues to Airtable ---")
     actions_log = []
     
     try:
-        airtable_table = PyAirtableApi(airtable_api_token).table(airtable_base_id, airtable_table_name)
+        airtable_table = common_utils.get_airtable_table(airtable_api_token, airtable_base_id, airtable_table_name)
     except Exception as e:
         logging.critical(f"Phase 1: Failed to initialize Airtable table object: {e}")
         return actions_log
 
-    processed_issue_count = 0
+    # Module constants read for every issue, bound once for the workers
+    dry_run = common_utils.DRY_RUN
+    debug_enabled = logging.getLogger().isEnabledFor(logging.DEBUG)
+    not_evaluated_prefix = common_utils.JIRA_NOT_EVALUATED_PREFIX_CONST
+    metadata_block_header = common_utils.METADATA_BLOCK_HEADER
+    # Issue URLs are {server}/browse/{key}; building them avoids a permalink() call per issue
+    jira_server_url = common_utils.JIRA_SERVER_URL
 
-    for issue in all_jira_issues_list:
-        jira_key = issue.key
-
-        # Filter out issues that should not be processed
-        if jira_key == common_utils.JIRA_CRO_INTAKE_FORM_KEY:
-            logging.debug(f"Phase 1: Skipping intake form template {jira_key}.")
-            continue
+    # Per-issue Jira work is pure network I/O and independent across issues, so it runs on a small
+    # thread pool. Airtable creates stay batched and sequential on this thread (Airtable allows ~5 req/s),
+    # and the shared key maps are only touched here.
 
-        if jira_key in jira_key_to_airtable_id_map:
-            logging.debug(f"Phase 1: Jira issue {jira_key} is already linked. Skipping.")
-            continue
+    def process_issue(issue):
+        """Steps A and B-prep for one issue. Returns None (skipped) or (action_details, pending create entry or None)."""
+        jira_key = issue.key
+        issue_fields = issue.fields
+        summary = issue_fields.summary
+        description = issue_fields.description
         
-        if issue.fields.summary.strip().startswith(common_utils.JIRA_NOT_EVALUATED_PREFIX_CONST):
+        if summary.lstrip().startswith(not_evaluated_prefix):
             logging.warning(f"Phase 1: Jira issue {jira_key} already has prefix but no Airtable link. Skipping for safety.")
-            continue
+            return None
 
         # If we reach here, this is a new Jira issue to process.
-        processed_issue_count += 1
-        logging.info(f"--- Processing New Jira Issue: {jira_key} ('{issue.fields.summary}') ---")
+        logging.info(f"--- Processing New Jira Issue: {jira_key} ('{summary}') ---")
         action_details = {
             "phase": 1, "type": "Jira->Airtable (New)", "jira_key": jira_key,
-            "original_summary": issue.fields.summary, "actions": [], "new_airtable_id": None, "error": None
+            "original_summary": summary, "actions": [], "new_airtable_id": None, "error": None
         }
 
         # --- Step A: Update Jira Issue ---
         try:
             # A-1. Prepend prefix to summary
-            new_summary = f"{common_utils.JIRA_NOT_EVALUATED_PREFIX_CONST} {issue.fields.summary}"
+            new_summary = f"{not_evaluated_prefix} {summary}"
             action_details["actions"].append(f"Jira: Plan to update summary to '{new_summary}'")
             logging.info(f"  [Plan] Jira {jira_key}: Update summary to '{new_summary}'")
-            if not common_utils.DRY_RUN:
+            if not dry_run:
                 issue.update(summary=new_summary)
                 logging.info(f"    [Live] Jira: Updated summary for {jira_key}.")
                 action_details["actions"][-1] = f"Jira: Successfully updated summary."
 
             # A-2. Set Jira Status to "Backlog"
             target_jira_status = common_utils.JIRA_NEW_ISSUE_STATUS
-            current_jira_status = issue.fields.status.name
+            current_jira_status = issue_fields.status.name
             action_details["actions"].append(f"Jira: Plan to set status to '{target_jira_status}'")
             logging.info(f"  [Plan] Jira {jira_key}: Set status to '{target_jira_status}' (from '{current_jira_status}')")
             if current_jira_status.lower() != target_jira_status.lower():
-                if not common_utils.DRY_RUN:
-                    transition_id = common_utils.find_jira_transition_id_by_name(jira_client, jira_key, target_jira_status)
+                if not dry_run:
+                    transition_id = common_utils.find_jira_transition_id_by_name(
+                        jira_client, jira_key, target_jira_status, workflow_key=common_utils.jira_workflow_key(issue)
+                    )
                     if transition_id:
                         jira_client.transition_issue(jira_key, transition_id)
+                        common_utils.invalidate_jira_transitions_cache(jira_key)
                         logging.info(f"    [Live] Jira: Transitioned {jira_key} to '{target_jira_status}'.")
                         action_details["actions"][-1] = f"Jira: Successfully transitioned to '{target_jira_status}'."
                     else:
@@ -83,89 +119,107 @@ def run_phase1(jira_client, airtable_api_token, airtable_base_id, airtable_table
         except Exception as e:
             logging.error(f"Phase 1: Failed during Jira update for {jira_key}: {e}")
             action_details["error"] = f"Jira Update Failed: {e}"
-            actions_log.append(action_details)
-            continue
+            return action_details, None
 
         # --- Step B: Create Airtable Record ---
         idea_name_field = common_utils.AIRTABLE_IDEA_NAME_FIELD
         if not idea_name_field:
             logging.error("Phase 1: AIRTABLE_IDEA_NAME_FIELD is not set in .env. Cannot create Airtable record.")
             action_details["error"] = "Configuration Error: AIRTABLE_IDEA_NAME_FIELD is not set."
-            actions_log.append(action_details)
-            continue 
+            return action_details, None
         
         
         airtable_fields_to_create = {
-            idea_name_field: f"{common_utils.JIRA_NOT_EVALUATED_PREFIX_CONST} {issue.fields.summary}",
+            idea_name_field: new_summary,
             common_utils.AIRTABLE_STATUS_FIELD: "Idea: Backlog",
             common_utils.AIRTABLE_JIRA_KEY_FIELD: jira_key,
-            common_utils.AIRTABLE_JIRA_URL_FIELD: issue.permalink()
+            common_utils.AIRTABLE_JIRA_URL_FIELD: f"{jira_server_url}/browse/{jira_key}"
         }
         
-        if issue.fields.description:
-            parsed_desc_data = common_utils.parse_jira_description_table_to_airtable_fields(issue.fields.description)
+        if description:
+            parsed_desc_data = common_utils.parse_jira_description_table_to_airtable_fields(description)
             airtable_fields_to_create.update(parsed_desc_data)
             action_details["actions"].append(f"Airtable: Parsed {len(parsed_desc_data)} fields from Jira description.")
             logging.info(f"  [Plan] Airtable: Parsed {len(parsed_desc_data)} fields from Jira description.")
         
         action_details["actions"].append(f"Airtable: Plan to create record with {len(airtable_fields_to_create)} fields.")
         logging.info(f"  [Plan] Airtable: Create record with {len(airtable_fields_to_create)} fields.")
-        if common_utils.SCRIPT_DEBUG_MODE:
-            logging.debug(f"    [Debug] Airtable fields to create: {json.dumps(airtable_fields_to_create, indent=2)}")
-
-        created_airtable_record_id = None
-        if not common_utils.DRY_RUN:
-            try:
-                created_record = airtable_table.create(airtable_fields_to_create)
-                created_airtable_record_id = created_record['id']
-                logging.info(f"    [Live] Airtable: Created record {created_airtable_record_id} for Jira issue {jira_key}.")
-                action_details["actions"][-1] = f"Airtable: Successfully created record." # Cleaned up message
-                # Update maps for the current run if successful
-                jira_key_to_airtable_id_map[jira_key] = created_airtable_record_id
-                airtable_id_to_jira_key_map[created_airtable_record_id] = jira_key
-            except Exception as e:
-                logging.error(f"    [Live] Airtable: Failed to create record for Jira issue {jira_key}: {e}")
-                action_details["error"] = f"Airtable Create Failed: {e}"
-                actions_log.append(action_details)
-                continue
-        else: # In Dry Run
-            created_airtable_record_id = f"DRYRUN_REC_FOR_{jira_key}"
-        
-        action_details["new_airtable_id"] = created_airtable_record_id
+        # Lazy %r: the dict is only formatted if a handler actually emits DEBUG
+        logging.debug("    [Debug] Airtable fields to create: %r", airtable_fields_to_create)
+
+        # Records are created in batches afterwards; Step C runs per issue once its record exists.
+        return action_details, (issue, action_details, airtable_fields_to_create, new_summary, description)
+
+    def update_jira_description(issue, action_details, new_summary, description, created_airtable_record_id):
+        """Step C for one issue whose Airtable record now exists. Returns its action_details."""
+        jira_key = action_details["jira_key"]
 
         # --- Step C: Update Jira Description with New Airtable Metadata ---
-        if created_airtable_record_id:
-            try:
-                current_jira_desc = issue.fields.description if issue.fields.description else ""
-                current_jira_desc_cleaned = re.sub(rf"\n\n{re.escape(common_utils.METADATA_BLOCK_HEADER)}.*$", "", current_jira_desc, flags=re.DOTALL).strip()
-                
-                metadata_lines = [f"\n\n{common_utils.METADATA_BLOCK_HEADER}"]
-                metadata_lines.append(f"{common_utils.METADATA_REC_ID_PREFIX}{created_airtable_record_id}")
-                
-                exp_id_val = common_utils.get_experiment_wxx_txx_id(new_summary)
-                if exp_id_val:
-                    metadata_lines.append(f"{common_utils.METADATA_EXP_ID_PREFIX}{exp_id_val}")
-                
-                airtable_url = f"https://airtable.com/{airtable_base_id}/{airtable_table_name}/{created_airtable_record_id}"
-                metadata_lines.append(f"{common_utils.METADATA_URL_PREFIX}{airtable_url}")
-                
-                updated_jira_description = current_jira_desc_cleaned + "\n" + "\n".join(metadata_lines)
-
-                action_details["actions"].append("Jira: Plan to update description with Airtable metadata.")
-                logging.info("  [Plan] Jira: Update description with Airtable metadata.")
-                if common_utils.SCRIPT_DEBUG_MODE:
-                    logging.debug(f"    [Debug] New Jira description metadata block:\n" + "\n".join(metadata_lines))
-                
-                if not common_utils.DRY_RUN:
-                    issue.update(description=updated_jira_description)
-                    logging.info(f"    [Live] Jira: Updated description for {jira_key} with Airtable metadata.")
-                    action_details["actions"][-1] = "Jira: Successfully updated description with Airtable metadata."
-            
-            except Exception as e:
-                logging.error(f"Phase 1: Failed during Jira description update for {jira_key}: {e}")
-                action_details["error"] = f"Jira Description Update Failed: {e}"
-        
-        actions_log.append(action_details)
+        try:
+            current_jira_desc = description if description else ""
+            current_jira_desc_cleaned = common_utils.METADATA_BLOCK_STRIP_RE.sub("", current_jira_desc).strip()
+    
+            metadata_lines = [f"\n\n{metadata_block_header}"]
+            metadata_lines.append(f"{common_utils.METADATA_REC_ID_PREFIX}{created_airtable_record_id}")
+    
+            exp_id_val = common_utils.get_experiment_wxx_txx_id(new_summary)
+            if exp_id_val:
+                metadata_lines.append(f"{common_utils.METADATA_EXP_ID_PREFIX}{exp_id_val}")
+    
+            airtable_url = f"https://airtable.com/{airtable_base_id}/{airtable_table_name}/{created_airtable_record_id}"
+            metadata_lines.append(f"{common_utils.METADATA_URL_PREFIX}{airtable_url}")
+    
+            updated_jira_description = current_jira_desc_cleaned + "\n" + "\n".join(metadata_lines)
+
+            action_details["actions"].append("Jira: Plan to update description with Airtable metadata.")
+            logging.info(f"  [Plan] Jira {jira_key}: Update description with Airtable metadata.")
+            if debug_enabled:
+                logging.debug("    [Debug] New Jira description metadata block:\n%s", "\n".join(metadata_lines))
+    
+            if not dry_run:
+                issue.update(description=updated_jira_description)
+                logging.info(f"    [Live] Jira: Updated description for {jira_key} with Airtable metadata.")
+                action_details["actions"][-1] = "Jira: Successfully updated description with Airtable metadata."
+
+        except Exception as e:
+            logging.error(f"Phase 1: Failed during Jira description update for {jira_key}: {e}")
+            action_details["error"] = f"Jira Description Update Failed: {e}"
+        return action_details
+
+    # Same JIRA_MAX_WORKERS cap as Phases 2 and 3 (and the HTTP pool size), so lowering it throttles every phase
+    with ThreadPoolExecutor(max_workers=common_utils.JIRA_MAX_WORKERS) as pool:
+        step_a_results = [result for result in pool.map(process_issue, all_jira_issues_list) if result]
+        processed_issue_count = len(step_a_results)
+        pending_creates = []
+        for action_details, pending_entry in step_a_results:
+            if pending_entry:
+                pending_creates.append(pending_entry)
+            else:
+                actions_log.append(action_details)
+
+        # --- Step B (cont.): Create Airtable Records in batches ---
+        description_updates = []
+        batch_size = common_utils.AIRTABLE_WRITE_BATCH_SIZE
+        for batch_start in range(0, len(pending_creates), batch_size):
+            batch = pending_creates[batch_start:batch_start + batch_size]
+            if not dry_run:
+                created_ids = _create_airtable_records(airtable_table, batch)
+            else: # In Dry Run
+                created_ids = [f"DRYRUN_REC_FOR_{action_details['jira_key']}" for _, action_details, _, _, _ in batch]
+
+            for (issue, action_details, _, new_summary, description), created_airtable_record_id in zip(batch, created_ids):
+                if not created_airtable_record_id:
+                    actions_log.append(action_details)
+                    continue
+                jira_key = action_details["jira_key"]
+                if not dry_run:
+                    # Update maps for the current run if successful
+                    jira_key_to_airtable_id_map[jira_key] = created_airtable_record_id
+                    airtable_id_to_jira_key_map[created_airtable_record_id] = jira_key
+                action_details["new_airtable_id"] = created_airtable_record_id
+                description_updates.append((issue, action_details, new_summary, description, created_airtable_record_id))
+
+        actions_log.extend(pool.map(lambda args: update_jira_description(*args), description_updates))
 
     logging.info(f"Phase 1 finished. Processed {processed_issue_count} new Jira issues.")
     return actions_log
\ No newline at end of file
@@ -2,9 +2,93 @@
 import logging
 import json
 import re
-import os
+from concurrent.futures import ThreadPoolExecutor, as_completed
 import common_utils
-from pyairtable import Api as PyAirtableApi
+
+# Max issues per Jira bulk create (POST /issue/bulk) request
+JIRA_BULK_CREATE_BATCH_SIZE = 50
+
+# Jira rejects summaries longer than this
+JIRA_SUMMARY_MAX_LENGTH = 255
+
+def _validate_jira_issue_dict(issue_dict):
+    """
+    Client-side check of the fields Jira always requires. Returns an error message, or None if the dict looks valid.
+    Catches the obviously bad rows before they cost a slot in a bulk create request.
+    """
+    if not (issue_dict.get('project') or {}).get('key'):
+        return "Missing Jira project key."
+    if not (issue_dict.get('issuetype') or {}).get('name'):
+        return "Missing Jira issue type."
+    summary = issue_dict.get('summary')
+    if not isinstance(summary, str) or not summary.strip():
+        return "Missing summary."
+    if len(summary) > JIRA_SUMMARY_MAX_LENGTH:
+        return f"Summary is longer than {JIRA_SUMMARY_MAX_LENGTH} characters."
+    if '\n' in summary:
+        return "Summary must be a single line."
+    return None
+
+def _bulk_create_jira_issues(jira_client, issue_dicts):
+    """
+    Creates the issues with Jira's bulk endpoint, JIRA_BULK_CREATE_BATCH_SIZE per request.
+    Dicts failing _validate_jira_issue_dict are not sent at all.
+    Returns [(issue_key, error)] aligned with issue_dicts: exactly one of the two is set per entry.
+    """
+    results = [None] * len(issue_dicts)
+    valid_indexes = []
+    for index, issue_dict in enumerate(issue_dicts):
+        validation_error = _validate_jira_issue_dict(issue_dict)
+        if validation_error:
+            results[index] = (None, f"Validation failed: {validation_error}")
+        else:
+            valid_indexes.append(index)
+    if len(valid_indexes) < len(issue_dicts):
+        logging.error("Phase 2: %d of %d issues failed validation and won't be sent to Jira.",
+                      len(issue_dicts) - len(valid_indexes), len(issue_dicts))
+
+    for batch_start in range(0, len(valid_indexes), JIRA_BULK_CREATE_BATCH_SIZE):
+        batch_indexes = valid_indexes[batch_start:batch_start + JIRA_BULK_CREATE_BATCH_SIZE]
+        try:
+            # create_issues keeps input order; prefetch=False skips re-fetching every created issue
+            batch_results = jira_client.create_issues(field_list=[issue_dicts[i] for i in batch_indexes], prefetch=False)
+            for index, result in zip(batch_indexes, batch_results):
+                if result['issue'] is not None:
+                    results[index] = (result['issue'].key, None)
+                else:
+                    results[index] = (None, result['error'])
+        except Exception as e:
+            for index in batch_indexes:
+                results[index] = (None, e)
+    return results
+
+def _transition_new_issue(jira_client, issue_key, transition_id, target_jira_status, action_details):
+    """Transitions one newly created issue; runs on a worker thread, so failures are logged rather than raised."""
+    try:
+        jira_client.transition_issue(issue_key, transition_id)
+        common_utils.invalidate_jira_transitions_cache(issue_key)
+    except Exception as e:
+        logging.error(f"    [Live] Jira: Failed to transition {issue_key}: {e}")
+        action_details["actions"].append({"step": "jira_transition", "status": "error", "detail": str(e), "target_status": target_jira_status})
+
+def _execute_transitions(jira_client, pending_transitions, new_issue_workflow_key):
+    """
+    Moves the new issues to their mapped status. Every new issue has the same project, issue type and
+    initial workflow status, so the transition IDs are looked up once (first issue) and then served from
+    the workflow cache for the rest. The transitions themselves are independent round-trips and run concurrently.
+    """
+    transition_tasks = []
+    for created_jira_issue_key, target_jira_status, action_details in pending_transitions:
+        transition_id = common_utils.find_jira_transition_id_by_name(
+            jira_client, created_jira_issue_key, target_jira_status, workflow_key=new_issue_workflow_key
+        )
+        if transition_id:
+            transition_tasks.append((created_jira_issue_key, transition_id, target_jira_status, action_details))
+    if transition_tasks:
+        with ThreadPoolExecutor(max_workers=min(common_utils.JIRA_MAX_WORKERS, len(transition_tasks))) as executor:
+            futures = [executor.submit(_transition_new_issue, jira_client, *task) for task in transition_tasks]
+            for future in as_completed(futures):
+                future.result()
 
 def run_phase2(jira_client, airtable_api_token, airtable_base_id, airtable_table_name,
                all_airtable_records_list,
@@ -13,126 +97,162 @@ def run_phase2(jira_client, airtable_api_token, airtable_base_id, airtable_table
                ):
     """
     Phase 2: Finds new Airtable records that need to be created in Jira.
+    all_airtable_records_list can be any iterable of records; it is consumed once.
     """
     logging.info("--- Executing Phase 2: New Airtable Records to Jira ---")
     actions_log = []
     
     try:
-        airtable_table = PyAirtableApi(airtable_api_token).table(airtable_base_id, airtable_table_name)
+        # Cached pooled keep-alive table, shared with Phase 1 (batch updates reuse its connections)
+        airtable_table = common_utils.get_airtable_table(airtable_api_token, airtable_base_id, airtable_table_name)
     except Exception as e:
         logging.critical(f"Phase 2: Failed to initialize Airtable table object: {e}")
         return actions_log
 
-    processed_airtable_record_count = 0
+    pending_creates = [] # (record_id, airtable status, issue_dict, action_details) awaiting the bulk create
+    # Config read for every record, bound once for the loop
+    dry_run = common_utils.DRY_RUN
+    # json.dumps(indent=2) of every issue dict only when DEBUG records will actually be emitted
+    debug_enabled = common_utils.SCRIPT_DEBUG_MODE and logging.getLogger().isEnabledFor(logging.DEBUG)
+    status_field = common_utils.AIRTABLE_STATUS_FIELD
+    statuses_for_creation = common_utils.AIRTABLE_STATUSES_FOR_JIRA_CREATION
+    headline_field = common_utils.AIRTABLE_HEADLINE_FIELD
+    project_key = common_utils.JIRA_PROJECT_KEY_CONFIG
+    issue_type_name = common_utils.JIRA_ISSUE_TYPE_NAME_CONFIG
+    cro_label = common_utils.JIRA_CRO_LABEL
+    cluster_cf = common_utils.JIRA_CLUSTER_CF
+    affected_country_cf = common_utils.JIRA_AFFECTED_COUNTRY_CF
+    required_date_cf = common_utils.JIRA_REQUIRED_DATE_CF
+    due_date_cf = common_utils.JIRA_DUE_DATE_CF
+    country_iso_to_name = common_utils.COUNTRY_ISO_TO_NAME
+    record_field_names = (
+        status_field, headline_field, common_utils.AIRTABLE_GOAL_FIELD, common_utils.AIRTABLE_COUNTRY_FIELD,
+        common_utils.AIRTABLE_PLANNED_START_DATE_FIELD, common_utils.AIRTABLE_ESTIMATED_END_DATE_FIELD
+    )
+    airtable_updates_enabled = common_utils.ENABLE_AIRTABLE_UPDATES
+    jira_server_url = common_utils.JIRA_SERVER_URL
+
+    # Fixed part of every issue dict. Copied shallowly per record: the nested values are shared but never mutated
+    # (create_issues only rewrites 'project'/'issuetype' when they are given as plain strings/ints)
+    issue_dict_prototype = {
+        'project': {'key': project_key},
+        'issuetype': {'name': issue_type_name},
+        'labels': [cro_label]
+    }
+
+    # A dry run only shows the rendered description in the debug dump, so skip building it otherwise
+    build_description = not dry_run or debug_enabled
 
-    for record in all_airtable_records_list:
+    # Unlinked records in a creation status; usually a handful out of the whole table
+    candidate_records = [
+        record for record in all_airtable_records_list
+        if record['id'] not in airtable_id_to_jira_key_map
+        and (status := record.get('fields', {}).get(status_field)) and status in statuses_for_creation
+    ]
+    processed_airtable_record_count = len(candidate_records)
+
+    for record in candidate_records:
         record_id = record['id']
         airtable_fields = record.get('fields', {})
-
-        if record_id in airtable_id_to_jira_key_map: continue
-        current_airtable_status = airtable_fields.get(common_utils.AIRTABLE_STATUS_FIELD)
-        if not current_airtable_status or current_airtable_status not in common_utils.AIRTABLE_STATUSES_FOR_JIRA_CREATION_LIST: continue
-        
-        processed_airtable_record_count += 1
-        headline_from_airtable = airtable_fields.get(common_utils.AIRTABLE_HEADLINE_FIELD)
-        logging.info(f"Phase 2: Found new Airtable record to process: {record_id} ('{headline_from_airtable}')")
+        # One pass over the fields this loop reads (missing ones come back as None)
+        current_airtable_status, headline_from_airtable, goal_raw, country_iso_raw, start_date, end_date = map(airtable_fields.get, record_field_names)
+        logging.info("Phase 2: Found new Airtable record to process: %s ('%s')", record_id, headline_from_airtable)
         action_details = { "phase": 2, "type": "Airtable->Jira (New)", "airtable_id": record_id, "airtable_summary": headline_from_airtable, "actions": [], "new_jira_key": None, "error": None }
 
+        if not headline_from_airtable:
+            logging.warning("Airtable record %s is missing its 'Full Name'. Skipping.", record_id)
+            action_details["error"] = f"Missing '{headline_field}' in Airtable."
+            actions_log.append(action_details)
+            continue
+
         try:
-            if not headline_from_airtable:
-                logging.warning(f"Airtable record {record_id} is missing its 'Full Name'. Skipping.")
-                action_details["error"] = f"Missing '{common_utils.AIRTABLE_HEADLINE_FIELD}' in Airtable."
-                actions_log.append(action_details)
-                continue
-            
             target_jira_headline = headline_from_airtable
-            full_jira_description = common_utils.format_full_jira_description(
-                record_id, airtable_fields, common_utils.AIRTABLE_BASE_ID_CONFIG, common_utils.AIRTABLE_TABLE_NAME_CONFIG
-            )
-
-            issue_dict = {
-                'project': {'key': common_utils.JIRA_PROJECT_KEY_CONFIG},
-                'summary': target_jira_headline,
-                'description': full_jira_description,
-                'issuetype': {'name': common_utils.JIRA_ISSUE_TYPE_NAME_CONFIG},
-                'labels': [common_utils.JIRA_CRO_LABEL]
-            }
+            if build_description:
+                full_jira_description = common_utils.format_full_jira_description(
+                    record_id, airtable_fields, common_utils.AIRTABLE_BASE_ID_CONFIG, common_utils.AIRTABLE_TABLE_NAME_CONFIG
+                )
+            else:
+                full_jira_description = ""
+
+            issue_dict = issue_dict_prototype.copy()
+            issue_dict['summary'] = target_jira_headline
+            issue_dict['description'] = full_jira_description
 
             # --- ADD CUSTOM FIELDS AND DATES TO THE CREATION DICTIONARY ---
             custom_fields = True
             if custom_fields:
-                if common_utils.JIRA_CLUSTER_CF:
-                    goal_raw = airtable_fields.get(common_utils.AIRTABLE_GOAL_FIELD)
+                if cluster_cf:
                     goal_value = common_utils.get_resolved_value_for_sync(goal_raw, common_utils.AIRTABLE_GOAL_IS_LINKED, common_utils.AIRTABLE_GOAL_LINKED_TABLE, common_utils.AIRTABLE_GOAL_DISPLAY_FIELD)
-                    if goal_value: issue_dict[common_utils.JIRA_CLUSTER_CF] = {'value': goal_value}
+                    if goal_value: issue_dict[cluster_cf] = {'value': goal_value}
 
-                if common_utils.JIRA_AFFECTED_COUNTRY_CF:
-                    country_iso_raw = airtable_fields.get(common_utils.AIRTABLE_COUNTRY_FIELD)
+                if affected_country_cf:
                     country_iso = common_utils.get_resolved_value_for_sync(country_iso_raw, common_utils.AIRTABLE_SITE_IS_LINKED, common_utils.AIRTABLE_SITE_LINKED_TABLE, common_utils.AIRTABLE_SITE_DISPLAY_FIELD)
                     if country_iso:
-                        country_name = common_utils.COUNTRY_ISO_TO_NAME.get(country_iso.upper())
-                        if country_name: issue_dict[common_utils.JIRA_AFFECTED_COUNTRY_CF] = [{'value': country_name}]
+                        # ISO codes usually come in upper-case already, so only upper() on a miss
+                        country_name = country_iso_to_name.get(country_iso) or country_iso_to_name.get(country_iso.upper())
+                        if country_name: issue_dict[affected_country_cf] = [{'value': country_name}]
 
-                if common_utils.JIRA_REQUIRED_DATE_CF:
-                    start_date = airtable_fields.get(common_utils.AIRTABLE_PLANNED_START_DATE_FIELD)
-                    if start_date: issue_dict[common_utils.JIRA_REQUIRED_DATE_CF] = common_utils.format_date_for_jira(start_date)
+                if required_date_cf and start_date:
+                    issue_dict[required_date_cf] = common_utils.format_date_for_jira(start_date)
                 
-                if common_utils.JIRA_DUE_DATE_CF:
-                    end_date = airtable_fields.get(common_utils.AIRTABLE_ESTIMATED_END_DATE_FIELD)
-                    if end_date: issue_dict[common_utils.JIRA_DUE_DATE_CF] = common_utils.format_date_for_jira(end_date)
+                if due_date_cf and end_date:
+                    issue_dict[due_date_cf] = common_utils.format_date_for_jira(end_date)
             # --- END OF NEW LOGIC ---
 
-            action_details["actions"].append(f"Jira: Plan to create issue with summary '{target_jira_headline}'.")
-            logging.info(f"  [Plan] Jira: Create issue with summary '{target_jira_headline}'")
-            if common_utils.SCRIPT_DEBUG_MODE: logging.debug(f"    [Debug] Full Jira issue data to be created: {json.dumps(issue_dict, indent=2)}")
+            action_details["actions"].append({"step": "jira_create", "status": "planned", "detail": target_jira_headline})
+            logging.info("  [Plan] Jira: Create issue with summary '%s'", target_jira_headline)
+            if debug_enabled: logging.debug("    [Debug] Full Jira issue data to be created: %s", json.dumps(issue_dict, indent=2))
         except Exception as e:
-            logging.error(f"Phase 2: Failed during Jira data preparation for Airtable record {record_id}: {e}", exc_info=True)
+            logging.error("Phase 2: Failed during Jira data preparation for Airtable record %s: %s", record_id, e, exc_info=True)
             action_details["error"] = f"Jira Data Prep Failed: {e}"
             actions_log.append(action_details)
             continue
 
-        created_jira_issue_key = f"DRYRUN_JIRA_FOR_{record_id}"
-        if not common_utils.DRY_RUN:
-            try:
-                new_issue = jira_client.create_issue(fields=issue_dict)
-                created_jira_issue_key = new_issue.key
-            except Exception as e:
-                logging.error(f"    [Live] Jira: Failed to create issue for Airtable record {record_id}: {e}")
-                action_details["error"] = f"Jira Create Failed: {e}"
-                actions_log.append(action_details)
-                continue
+        pending_creates.append((record_id, current_airtable_status, issue_dict, action_details))
+
+    # --- Create all prepared issues with the bulk endpoint (one request per batch instead of one per record) ---
+    if not dry_run:
+        create_results = _bulk_create_jira_issues(jira_client, [issue_dict for _, _, issue_dict, _ in pending_creates])
+    else:
+        create_results = [(f"DRYRUN_JIRA_FOR_{record_id}", None) for record_id, _, _, _ in pending_creates]
+
+    pending_transitions = [] # (new issue key, target status, action_details)
+    pending_airtable_updates = [] # (record_id, fields_to_update, action_details)
+    for (record_id, current_airtable_status, _, action_details), (created_jira_issue_key, create_error) in zip(pending_creates, create_results):
+        if create_error is not None:
+            logging.error("    [Live] Jira: Failed to create issue for Airtable record %s: %s", record_id, create_error)
+            action_details["error"] = f"Jira Create Failed: {create_error}"
+            actions_log.append(action_details)
+            continue
         action_details["new_jira_key"] = created_jira_issue_key
 
         if created_jira_issue_key:
             target_jira_status = common_utils.STATUS_MAPPING_AIRTABLE_TO_JIRA.get(current_airtable_status)
             if target_jira_status:
-                action_details["actions"].append(f"Jira: Plan to set status of new issue to '{target_jira_status}'.")
-                logging.info(f"  [Plan] Jira: Set status of new issue {created_jira_issue_key} to '{target_jira_status}'.")
-                if not common_utils.DRY_RUN:
-                    transition_id = common_utils.find_jira_transition_id_by_name(jira_client, created_jira_issue_key, target_jira_status)
-                    if transition_id:
-                        try:
-                            jira_client.transition_issue(created_jira_issue_key, transition_id)
-                        except Exception as e:
-                            logging.error(f"    [Live] Jira: Failed to transition {created_jira_issue_key}: {e}")
-
-        if os.getenv('ENABLE_AIRTABLE_UPDATES', 'False').lower() == 'true' and created_jira_issue_key:
+                action_details["actions"].append({"step": "jira_transition", "status": "planned", "detail": target_jira_status})
+                logging.info("  [Plan] Jira: Set status of new issue %s to '%s'.", created_jira_issue_key, target_jira_status)
+                if not dry_run:
+                    pending_transitions.append((created_jira_issue_key, target_jira_status, action_details))
+
+        if airtable_updates_enabled and created_jira_issue_key:
             fields_to_update = {
                 common_utils.AIRTABLE_JIRA_KEY_FIELD: created_jira_issue_key,
-                common_utils.AIRTABLE_JIRA_URL_FIELD: f"{os.getenv('JIRA_SERVER_URL')}/browse/{created_jira_issue_key}"
+                common_utils.AIRTABLE_JIRA_URL_FIELD: f"{jira_server_url}/browse/{created_jira_issue_key}"
             }
-            action_details["actions"].append(f"Airtable: Plan to update record {record_id} with Jira key.")
-            logging.info(f"  [Plan] Airtable: Update record {record_id} with Jira key '{created_jira_issue_key}'.")
-            if not common_utils.DRY_RUN:
-                try:
-                    airtable_table.update(record_id, fields_to_update)
-                except Exception as e:
-                    logging.error(f"    [Live] Airtable: Failed to update record {record_id}: {e}")
-                    action_details["error"] = f"Airtable Update Failed: {e}"
+            action_details["actions"].append({"step": "airtable_update", "status": "planned", "detail": record_id})
+            logging.info("  [Plan] Airtable: Update record %s with Jira key '%s'.", record_id, created_jira_issue_key)
+            if not dry_run:
+                pending_airtable_updates.append((record_id, fields_to_update, action_details))
         else:
-            action_details["actions"].append(f"Airtable: Update is disabled by flag or Jira issue not created.")
+            action_details["actions"].append({"step": "airtable_update", "status": "skipped", "detail": None})
         
         actions_log.append(action_details)
 
+    # --- Transitions (Jira) and the key write-back (Airtable) don't depend on each other, so they overlap ---
+    with ThreadPoolExecutor(max_workers=1) as airtable_writer:
+        airtable_future = airtable_writer.submit(common_utils.batch_update_airtable_records, airtable_table, pending_airtable_updates)
+        _execute_transitions(jira_client, pending_transitions, (project_key, issue_type_name, "<created>"))
+        airtable_future.result()
+
     logging.info(f"Phase 2 finished. Processed {processed_airtable_record_count} new Airtable records.")
     return actions_log
\ No newline at end of file
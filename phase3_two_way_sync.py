@@ -1,36 +1,104 @@
 # phase3_two_way_sync.py
+import functools
 import logging
 import json
 import re
 import os
+from collections import defaultdict
+from concurrent.futures import ThreadPoolExecutor
 from datetime import datetime, timezone
 import common_utils
-from pyairtable import Api as PyAirtableApi
+
+# Timestamp strings repeat across pairs and comments, so parsed values are cached per string
+
+@functools.lru_cache(maxsize=4096)
+def _parse_jira_timestamp(timestamp_str):
+    """
+    Parses Jira's '2024-05-01T10:00:00.000+0000' timestamps. fromisoformat is much faster than strptime
+    and takes this format from Python 3.11 on; older versions fall back to strptime.
+    """
+    try:
+        return datetime.fromisoformat(timestamp_str)
+    except ValueError:
+        return datetime.strptime(timestamp_str, '%Y-%m-%dT%H:%M:%S.%f%z')
+
+@functools.lru_cache(maxsize=4096)
+def _parse_airtable_timestamp(timestamp_str):
+    """Parses Airtable's UTC timestamps ('...Z') into offset-aware datetimes. Raises ValueError if malformed."""
+    # Parse the ISO string from Airtable into a naive datetime object first,
+    # then make it offset-aware by attaching the UTC timezone
+    return datetime.fromisoformat(timestamp_str.replace('Z', '')).replace(tzinfo=timezone.utc)
 
 # --- COMMENTS MANAGEMENT ---
- 
+
+# Issue keys per "key in (...)" JQL search when prefetching comments
+JIRA_COMMENT_FETCH_BATCH_SIZE = 100
+
+def batch_fetch_jira_comments(jira_client, jira_keys):
+    """
+    Fetches the comments of many issues with one JQL search per JIRA_COMMENT_FETCH_BATCH_SIZE keys.
+    Returns {jira_key: [comments]}. Keys whose batch failed, or whose embedded comment list came back
+    truncated, are left out so sync_native_comments falls back to jira_client.comments() for them.
+    """
+    comments_by_key = {}
+    for batch_start in range(0, len(jira_keys), JIRA_COMMENT_FETCH_BATCH_SIZE):
+        batch_keys = jira_keys[batch_start:batch_start + JIRA_COMMENT_FETCH_BATCH_SIZE]
+        try:
+            issues = jira_client.search_issues(
+                f"key in ({','.join(batch_keys)})", startAt=0, maxResults=len(batch_keys), fields="comment"
+            )
+        except Exception as e:
+            logging.warning(f"  [Comment Sync] Batch comment fetch for {len(batch_keys)} issues failed ({e}). Fetching per issue instead.")
+            continue
+        for issue in issues:
+            comment_field = getattr(issue.fields, 'comment', None)
+            if comment_field is None:
+                continue
+            comments = comment_field.comments
+            if getattr(comment_field, 'total', len(comments)) > len(comments):
+                continue
+            comments_by_key[issue.key] = comments
+    logging.info(f"  [Comment Sync] Prefetched comments for {len(comments_by_key)} of {len(jira_keys)} Jira issues.")
+    return comments_by_key
+
+@functools.lru_cache(maxsize=8)
+def _sync_id_pattern(prefix):
+    # Only a couple of prefixes exist, so each pattern is compiled once instead of per comment
+    return re.compile(rf"\[{re.escape(prefix)}:(\S+)\]")
+
 def extract_sync_id(comment_body, prefix):
     """Extracts a sync ID like [Prefix: 12345] from a comment body."""
     if not comment_body: return None
-    match = re.search(rf"\[{re.escape(prefix)}:(\S+)\]", comment_body)
+    match = _sync_id_pattern(prefix).search(comment_body)
     return match.group(1) if match else None
 
-def sync_native_comments(jira_client, airtable_table, jira_key, airtable_id):
+def sync_native_comments(jira_client, airtable_table, jira_key, airtable_id, jira_comments=None):
     """
     Performs two-way sync for native comments on a matched pair.
+    jira_comments can be passed in from batch_fetch_jira_comments; it is fetched here if None.
     Returns a list of action strings for the QA report.
     """
     logging.info(f"  [Comment Sync] Starting native comment sync for Jira {jira_key} <-> Airtable {airtable_id}.")
     actions = []
+    # The synced comment bodies (and their timestamps) are only built when they are actually posted
+    dry_run = common_utils.DRY_RUN
     
     try:
         # 1. Get all comments from both systems
-        jira_comments = jira_client.comments(jira_key)
+        if jira_comments is None:
+            jira_comments = jira_client.comments(jira_key)
         airtable_comments = airtable_table.comments(airtable_id)
 
-        # 2. Create sets of existing synced IDs for quick lookups
-        synced_from_airtable_ids = {extract_sync_id(c.body, "AirtableCommentID") for c in jira_comments}
-        synced_from_jira_ids = {extract_sync_id(c.text, "JiraCommentID") for c in airtable_comments}
+        # 2. Create sets of existing synced IDs for quick lookups. One regex scan per Jira comment:
+        # it either carries an Airtable sync ID (a copy we made) or it's a native Jira comment.
+        synced_from_airtable_ids = set()
+        native_jira_comments = []
+        for c in jira_comments:
+            if sync_id := extract_sync_id(c.body, "AirtableCommentID"):
+                synced_from_airtable_ids.add(sync_id)
+            else:
+                native_jira_comments.append(c)
+        synced_from_jira_ids = {sync_id for c in airtable_comments if (sync_id := extract_sync_id(c.text, "JiraCommentID"))}
 
         # 3. Sync NEW Airtable comments TO Jira
         for a_comment in airtable_comments:
@@ -44,16 +112,16 @@ def sync_native_comments(jira_client, airtable_table, jira_key, airtable_id):
                     author_name = a_comment.author.name or a_comment.author.email or "Unknown Airtable User"
                 # -------------------------
 
-                timestamp_str = a_comment.created_time.strftime('%Y-%m-%d %H:%M')
-                
-                jira_comment_body = (
-                    f"{author_name} (from Airtable at {timestamp_str}):\n"
-                    f"{a_comment.text}\n\n"
-                    f"[AirtableCommentID:{a_comment.id}]"
-                )
-                
                 actions.append(f"Jira: Plan to add new comment from Airtable user '{author_name}'.")
-                if not common_utils.DRY_RUN:
+                if not dry_run:
+                    timestamp_str = a_comment.created_time.strftime('%Y-%m-%d %H:%M')
+
+                    jira_comment_body = (
+                        f"{author_name} (from Airtable at {timestamp_str}):\n"
+                        f"{a_comment.text}\n\n"
+                        f"[AirtableCommentID:{a_comment.id}]"
+                    )
+
                     try:
                         jira_client.add_comment(jira_key, jira_comment_body)
                         logging.info(f"      [Live] Jira: Added comment from Airtable {a_comment.id} to {jira_key}.")
@@ -62,32 +130,31 @@ def sync_native_comments(jira_client, airtable_table, jira_key, airtable_id):
                         actions.append(f"Jira: ERROR adding comment from Airtable: {e}")
 
         # 4. Sync NEW Jira comments TO Airtable
-        for j_comment in jira_comments:
+        for j_comment in native_jira_comments:
             if j_comment.id not in synced_from_jira_ids:
-                if not extract_sync_id(j_comment.body, "AirtableCommentID"):
-                    logging.info(f"    Found new Jira comment {j_comment.id} to sync to Airtable.")
-                    
-                    # Jira's author object is also an object, not a dict. Accessing via attribute is safer.
-                    author_name = "Unknown Jira User"
-                    if hasattr(j_comment, 'author') and j_comment.author:
-                        author_name = getattr(j_comment.author, 'displayName', 'Unknown Jira User')
+                logging.info(f"    Found new Jira comment {j_comment.id} to sync to Airtable.")
+                
+                # Jira's author object is also an object, not a dict. Accessing via attribute is safer.
+                author_name = "Unknown Jira User"
+                if hasattr(j_comment, 'author') and j_comment.author:
+                    author_name = getattr(j_comment.author, 'displayName', 'Unknown Jira User')
+
+                actions.append(f"Airtable: Plan to add new comment from Jira user '{author_name}'.")
+                if not dry_run:
+                    timestamp_str = _parse_jira_timestamp(j_comment.created).strftime('%Y-%m-%d %H:%M')
 
-                    timestamp_str = datetime.strptime(j_comment.created, '%Y-%m-%dT%H:%M:%S.%f%z').strftime('%Y-%m-%d %H:%M')
-                    
                     airtable_comment_text = (
-                    f"{author_name} (from Jira at {timestamp_str}):\n"
-                    f"{j_comment.body}\n\n"
-                    f"[JiraCommentID:{j_comment.id}]"
-                )
-                    
-                    actions.append(f"Airtable: Plan to add new comment from Jira user '{author_name}'.")
-                    if not common_utils.DRY_RUN:
-                        try:
-                            airtable_table.add_comment(airtable_id, airtable_comment_text)
-                            logging.info(f"      [Live] Airtable: Added comment from Jira {j_comment.id} to {airtable_id}.")
-                        except Exception as e:
-                            logging.error(f"      [Live] Airtable: Failed to add comment to {airtable_id}: {e}")
-                            actions.append(f"Airtable: ERROR adding comment from Jira: {e}")
+                        f"{author_name} (from Jira at {timestamp_str}):\n"
+                        f"{j_comment.body}\n\n"
+                        f"[JiraCommentID:{j_comment.id}]"
+                    )
+
+                    try:
+                        airtable_table.add_comment(airtable_id, airtable_comment_text)
+                        logging.info(f"      [Live] Airtable: Added comment from Jira {j_comment.id} to {airtable_id}.")
+                    except Exception as e:
+                        logging.error(f"      [Live] Airtable: Failed to add comment to {airtable_id}: {e}")
+                        actions.append(f"Airtable: ERROR adding comment from Jira: {e}")
 
     except Exception as e:
         logging.error(f"  [Comment Sync] Failed for pair {jira_key}/{airtable_id}: {e}", exc_info=True)
@@ -98,22 +165,32 @@ def sync_native_comments(jira_client, airtable_table, jira_key, airtable_id):
 
 # --- SPRINT MANAGEMENT HELPER ---
 # This helper function can stay within this module as it's specific to Phase 3.
-def find_or_create_sprint(jira_client, board_id, sprint_name):
+def fetch_open_sprints_by_name(jira_client, board_id):
+    """Returns {casefolded sprint name: sprint ID} for the board's sprints that aren't closed. Raises on API errors."""
+    open_sprints_by_name = {}
+    # The board filters out closed sprints (usually most of them) itself, and maxResults=False pages
+    # through all the rest; the default first 50 could miss an open sprint and create a duplicate.
+    for sprint in jira_client.sprints(board_id, state='active,future', maxResults=False):
+        # Sprints can have the same name, but we look for one that isn't closed. First one wins.
+        if sprint.state != 'closed':
+            open_sprints_by_name.setdefault(sprint.name.casefold(), sprint.id)
+    return open_sprints_by_name
+
+def find_or_create_sprint(jira_client, board_id, sprint_name, open_sprints_by_name=None):
     """
     Finds an existing, active sprint by name. If not found, creates a new one.
+    open_sprints_by_name (from fetch_open_sprints_by_name) lets several calls share one sprint list;
+    it is fetched here if None, and sprints created here are added to it.
     Returns the sprint ID.
     """
     try:
-        # --- THIS IS THE CORRECTED LINE ---
-        # It uses jira_client.sprints(board_id)
-        all_sprints = jira_client.sprints(board_id)
-        # ------------------------------------
-
-        for sprint in all_sprints:
-            # Sprints can have the same name, but we look for one that isn't closed.
-            if sprint.name.lower() == sprint_name.lower() and sprint.state != 'closed':
-                logging.debug(f"  [Sprint] Found existing sprint '{sprint.name}' with ID {sprint.id}.")
-                return sprint.id
+        if open_sprints_by_name is None:
+            open_sprints_by_name = fetch_open_sprints_by_name(jira_client, board_id)
+
+        sprint_id = open_sprints_by_name.get(sprint_name.casefold())
+        if sprint_id is not None:
+            logging.debug(f"  [Sprint] Found existing sprint '{sprint_name}' with ID {sprint_id}.")
+            return sprint_id
         
         # If no active/future sprint is found with that name, create a new one.
         logging.info(f"  [Sprint] No existing active/future sprint found for '{sprint_name}'. Planning to create.")
@@ -121,10 +198,12 @@ def find_or_create_sprint(jira_client, board_id, sprint_name):
             # The board_id must be an integer for this call.
             new_sprint = jira_client.create_sprint(name=sprint_name, board_id=board_id)
             logging.info(f"    [Live] Sprint: Created new sprint '{new_sprint.name}' with ID {new_sprint.id}.")
-            return new_sprint.id
+            sprint_id = new_sprint.id
         else:
             logging.info(f"    [DRY RUN] Would create new sprint '{sprint_name}'.")
-            return f"DRYRUN_SPRINT_ID_FOR_{sprint_name}"
+            sprint_id = f"DRYRUN_SPRINT_ID_FOR_{sprint_name}"
+        open_sprints_by_name[sprint_name.casefold()] = sprint_id
+        return sprint_id
 
     except Exception as e:
         # Provide more context in the error log
@@ -149,24 +228,75 @@ def run_phase3(jira_client, airtable_api_token, airtable_base_id, airtable_table
     actions_log = []
     
     try:
-        airtable_table = PyAirtableApi(airtable_api_token).table(airtable_base_id, airtable_table_name)
+        # Pooled keep-alive table with the 429 retry policy; the pairs below hit it concurrently
+        airtable_table = common_utils.get_airtable_table(airtable_api_token, airtable_base_id, airtable_table_name)
     except Exception as e:
         logging.critical(f"Phase 3: Failed to initialize Airtable table object: {e}")
         return actions_log
 
-    processed_item_count = 0
-    issues_to_sprint = []
+    # Status maps read for every pair, bound once
+    status_airtable_to_jira = common_utils.STATUS_MAPPING_AIRTABLE_TO_JIRA
+    status_jira_to_airtable = common_utils.STATUS_MAPPING_JIRA_TO_AIRTABLE
+    status_airtable_to_jira_lc = common_utils.STATUS_MAPPING_AIRTABLE_TO_JIRA_LC
+    status_jira_to_airtable_lc = common_utils.STATUS_MAPPING_JIRA_TO_AIRTABLE_LC
+    status_field = common_utils.AIRTABLE_STATUS_FIELD
+
+    def status_sync_flags(airtable_status, jira_status):
+        """Returns (expected_jira_status, expected_airtable_status, is_jira_out_of_sync, is_airtable_out_of_sync)."""
+        expected_jira_status = status_airtable_to_jira.get(airtable_status)
+        expected_airtable_status = status_jira_to_airtable.get(jira_status)
+
+        # Expected values come pre-casefolded from the _LC maps
+        is_jira_out_of_sync = expected_jira_status and jira_status.casefold() != status_airtable_to_jira_lc[airtable_status]
+        is_airtable_out_of_sync = expected_airtable_status and airtable_status.casefold() != status_jira_to_airtable_lc[jira_status]
+        return expected_jira_status, expected_airtable_status, is_jira_out_of_sync, is_airtable_out_of_sync
 
+    # Pairs with both sides present; the rest can't be synced
+    matched_pairs = []
     for jira_key, airtable_id in jira_key_to_airtable_id_map.items():
-        processed_item_count += 1
-        
         jira_issue = all_jira_issues_map.get(jira_key)
         airtable_record = all_airtable_records_map.get(airtable_id)
 
         if not jira_issue or not airtable_record:
             logging.warning(f"Phase 3: Could not find full data for matched pair Jira {jira_key} / Airtable {airtable_id}. Skipping.")
             continue
-            
+        matched_pairs.append((jira_key, airtable_id, jira_issue, airtable_record))
+    processed_item_count = len(jira_key_to_airtable_id_map)
+    issues_to_sprint = [jira_issue for _, _, jira_issue, _ in matched_pairs] if common_utils.ENABLE_SPRINT_MANAGEMENT else []
+
+    # Most pairs are usually already in sync. Without comment sync there is nothing else to do for those,
+    # so only the mismatched ones go through sync_pair. With comment sync on, every pair still has to be
+    # visited: Airtable has no cheap way to tell which records have new comments.
+    if common_utils.ENABLE_COMMENT_SYNC:
+        pairs_to_sync = matched_pairs
+    else:
+        pairs_to_sync = []
+        for pair in matched_pairs:
+            try:
+                _, _, is_jira_out_of_sync, is_airtable_out_of_sync = status_sync_flags(
+                    pair[3].get('fields', {}).get(status_field), pair[2].fields.status.name
+                )
+                needs_sync = is_jira_out_of_sync or is_airtable_out_of_sync
+            except Exception:
+                needs_sync = True # Let sync_pair hit and report the error
+            if needs_sync:
+                pairs_to_sync.append(pair)
+        if len(pairs_to_sync) < len(matched_pairs):
+            logging.info(f"Phase 3: {len(matched_pairs) - len(pairs_to_sync)} matched pairs already in sync. Skipping them.")
+
+    # One JQL search per 100 pairs instead of one comments() call per pair.
+    # Airtable has no bulk comments endpoint, so its side is still read per record.
+    prefetched_jira_comments = {}
+    if common_utils.ENABLE_COMMENT_SYNC:
+        prefetched_jira_comments = batch_fetch_jira_comments(jira_client, [jira_key for jira_key, _, _, _ in matched_pairs])
+
+    pending_airtable_updates = [] # (record_id, fields, action_details); appended from the pool threads
+
+    def sync_pair(pair):
+        """Chunks 3.A-3.C for one matched pair. Returns the action_details entries to log for it."""
+        jira_key, airtable_id, jira_issue, airtable_record = pair
+        pair_log = []
+
         logging.info(f"--- Syncing Matched Pair: Jira {jira_key} <-> Airtable {airtable_id} ---")
         action_details = {
             "phase": 3, "type": "Sync", "jira_key": jira_key, "airtable_id": airtable_id,
@@ -174,34 +304,24 @@ def run_phase3(jira_client, airtable_api_token, airtable_base_id, airtable_table
         }
 
         airtable_fields = airtable_record.get('fields', {})
-        if common_utils.ENABLE_SPRINT_MANAGEMENT:
-            issues_to_sprint.append(jira_issue)
 
         # --- Chunk 3.A: Two-Way Status Sync (with Timestamps) ---
         try:
-            airtable_status = airtable_fields.get(common_utils.AIRTABLE_STATUS_FIELD)
+            airtable_status = airtable_fields.get(status_field)
             jira_status = jira_issue.fields.status.name
-            expected_jira_status = common_utils.STATUS_MAPPING_AIRTABLE_TO_JIRA.get(airtable_status)
-            expected_airtable_status = common_utils.STATUS_MAPPING_JIRA_TO_AIRTABLE.get(jira_status)
-
-            is_jira_out_of_sync = expected_jira_status and jira_status.lower() != expected_jira_status.lower()
-            is_airtable_out_of_sync = expected_airtable_status and airtable_status.lower() != expected_airtable_status.lower()
+            expected_jira_status, expected_airtable_status, is_jira_out_of_sync, is_airtable_out_of_sync = status_sync_flags(
+                airtable_status, jira_status
+            )
 
             if is_jira_out_of_sync or is_airtable_out_of_sync:
                 logging.info(f"  [Status Sync] Mismatch detected! Airtable is '{airtable_status}', Jira is '{jira_status}'.")
                 
-                jira_updated_dt = datetime.strptime(jira_issue.fields.updated, '%Y-%m-%dT%H:%M:%S.%f%z')
-                
                 # Use ythe "Last Updated At" field from Airtable
                 airtable_updated_str = airtable_fields.get(common_utils.AIRTABLE_LAST_MODIFIED_FIELD_NAME)
                 airtable_updated_dt = None
                 if airtable_updated_str:
                     try:
-                        # Parse the ISO string from Airtable into a naive datetime object first
-                        naive_dt = datetime.fromisoformat(airtable_updated_str.replace('Z', ''))
-                        # Then, make it offset-aware by attaching the UTC timezone
-                        airtable_updated_dt = naive_dt.replace(tzinfo=timezone.utc)
-                        # -------------------------
+                        airtable_updated_dt = _parse_airtable_timestamp(airtable_updated_str)
                         logging.debug(f"  Fetched and processed Airtable timestamp: {airtable_updated_dt}")
                     except ValueError:
                         logging.error(f"  Could not parse Airtable timestamp string: '{airtable_updated_str}'")
@@ -210,25 +330,27 @@ def run_phase3(jira_client, airtable_api_token, airtable_base_id, airtable_table
                     logging.warning(f"  Airtable timestamp field '{common_utils.AIRTABLE_LAST_MODIFIED_FIELD_NAME}' not found or empty for {airtable_id}. Cannot sync status based on time.")
                     action_details["actions"].append(f"Status Sync: SKIPPED - Missing Airtable timestamp.")
                 else:
+                    # Only parsed once there is an Airtable timestamp to compare it with
+                    jira_updated_dt = _parse_jira_timestamp(jira_issue.fields.updated)
                     if jira_updated_dt > airtable_updated_dt and is_airtable_out_of_sync:
                         logging.info(f"  Jira is newer. Planning to update Airtable status to '{expected_airtable_status}'.")
                         action_details["actions"].append(f"Airtable: Plan to update status to '{expected_airtable_status}'.")
                         if not common_utils.DRY_RUN:
-                            try:
-                                airtable_table.update(airtable_id, {common_utils.AIRTABLE_STATUS_FIELD: expected_airtable_status})
-                                logging.info(f"    [Live] Airtable: Updated status for {airtable_id}.")
-                            except Exception as e:
-                                logging.error(f"    [Live] Airtable: Failed to update status for {airtable_id}: {e}")
-                                action_details["error"] = f"Airtable Status Update Failed: {e}"
+                            # Written in batches of 10 once all pairs are done
+                            pending_airtable_updates.append((airtable_id, {common_utils.AIRTABLE_STATUS_FIELD: expected_airtable_status}, action_details))
                     
                     elif airtable_updated_dt > jira_updated_dt and is_jira_out_of_sync:
                         logging.info(f"  Airtable is newer. Planning to update Jira status to '{expected_jira_status}'.")
                         action_details["actions"].append(f"Jira: Plan to update status to '{expected_jira_status}'.")
                         if not common_utils.DRY_RUN:
-                            transition_id = common_utils.find_jira_transition_id_by_name(jira_client, jira_key, expected_jira_status)
+                            # Keyed by (project, issue type, current status): one /transitions call per workflow position
+                            transition_id = common_utils.find_jira_transition_id_by_name(
+                                jira_client, jira_key, expected_jira_status, workflow_key=common_utils.jira_workflow_key(jira_issue)
+                            )
                             if transition_id:
                                 try:
                                     jira_client.transition_issue(jira_key, transition_id)
+                                    common_utils.invalidate_jira_transitions_cache(jira_key)
                                 except Exception as e:
                                     logging.error(f"    [Live] Jira: Failed to transition {jira_key}: {e}")
                                     action_details["error"] = f"Jira Transition Failed: {e}"
@@ -244,12 +366,14 @@ def run_phase3(jira_client, airtable_api_token, airtable_base_id, airtable_table
         # --- Chunk 3.B: One-Way Field Sync (Airtable -> Jira) ---
         # Only add to log if there was a meaningful action or error
         if len(action_details["actions"]) > 1 or action_details["error"]:
-             actions_log.append(action_details)
+             pair_log.append(action_details)
 
 # --- Chunk 3.C: Two-Way Comment Sync ---
         if common_utils.ENABLE_COMMENT_SYNC:
             try:
-                comment_actions = sync_native_comments(jira_client, airtable_table, jira_key, airtable_id)
+                comment_actions = sync_native_comments(
+                    jira_client, airtable_table, jira_key, airtable_id, prefetched_jira_comments.get(jira_key)
+                )
                 if comment_actions:
                     # Extend the list of actions for the QA report
                     action_details["actions"].extend(comment_actions)
@@ -266,8 +390,20 @@ def run_phase3(jira_client, airtable_api_token, airtable_base_id, airtable_table
              # Filter out simple "OK" messages for a cleaner report
              action_details["actions"] = [action for action in action_details["actions"] if action != "Status Sync: OK."]
              if action_details["actions"] or action_details["error"]: # Check again after filtering
-                actions_log.append(action_details)
+                pair_log.append(action_details)
+        return pair_log
+
+    # Each pair is a handful of blocking Jira/Airtable round-trips independent of the other pairs,
+    # so they run on a thread pool. map() keeps the log in pair order.
+    with ThreadPoolExecutor(max_workers=common_utils.JIRA_MAX_WORKERS) as pool:
+        for pair_log in pool.map(sync_pair, pairs_to_sync):
+            actions_log.extend(pair_log)
 
+    if pending_airtable_updates:
+        failed_count = common_utils.batch_update_airtable_records(
+            airtable_table, pending_airtable_updates, error_label="Airtable Status Update Failed"
+        )
+        logging.info(f"    [Live] Airtable: Sent status updates for {len(pending_airtable_updates) - failed_count} records ({failed_count} failed).")
 
     # --- Chunk 3.D: Sprint Management (processed after all items are checked) ---
     if common_utils.ENABLE_SPRINT_MANAGEMENT and issues_to_sprint:
@@ -278,19 +414,27 @@ def run_phase3(jira_client, airtable_api_token, airtable_base_id, airtable_table
         logging.warning("Sprint Management is enabled, but JIRA_BOARD_ID_FOR_SPRINTS is not set in .env or loaded in common_utils. Skipping.")
     else:
             # Group issues by their "Wxx" ID
-            sprint_groups = {}
+            sprint_groups = defaultdict(list)
             for issue in issues_to_sprint:
                 wxx_id = common_utils.get_experiment_wxx_txx_id(issue.fields.summary)
                 if wxx_id:
                     sprint_name = wxx_id.split('T')[0] # Get the "Wxx" part
-                    if sprint_name not in sprint_groups:
-                        sprint_groups[sprint_name] = []
                     sprint_groups[sprint_name].append(issue.key)
             
+            # The board's sprint list is fetched once and shared by all the groups below
+            open_sprints_by_name = None
+            if sprint_groups:
+                try:
+                    open_sprints_by_name = fetch_open_sprints_by_name(jira_client, int(board_id))
+                except Exception as e:
+                    # Without the shared list every group would refetch (and fail) on its own
+                    logging.error(f"  [Sprint] Could not fetch sprints for board ID {board_id}: {e}. Skipping sprint management for this run.")
+                    sprint_groups.clear()
+
             # For each group, find/create the sprint and add issues
             for sprint_name, issue_keys in sprint_groups.items():
                 logging.info(f"  Processing sprint '{sprint_name}' for {len(issue_keys)} issues.")
-                sprint_id = find_or_create_sprint(jira_client, int(board_id), sprint_name)
+                sprint_id = find_or_create_sprint(jira_client, int(board_id), sprint_name, open_sprints_by_name)
                 if sprint_id and not str(sprint_id).startswith("DRYRUN"):
                     try:
                         # Add issues to the sprint. The API can take a list of keys.
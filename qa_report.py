@@ -1,27 +1,45 @@
 # qa_report.py
+import csv
 import logging
 import os
 import re
+import sys
 from datetime import datetime
 from tabulate import tabulate
 import common_utils
 from collections import defaultdict
 
+# Panel macros, color macros and h-level headers, removed in a single scan
+_REPORT_MARKUP_RE = re.compile(r"\{panel:.*?\}|\{color:.*?\}|h\d\.", re.DOTALL)
+_BLANK_LINES_RE = re.compile(r'\n\s*\n')
+# Drops '*' (bold) and '+', turns table separators '|' into newlines; one pass in C
+_REPORT_CHAR_TABLE = str.maketrans({"*": None, "+": None, "|": "\n"})
+
+# Runs with more than twice this many detailed rows get the full log as a CSV and only the
+# first/last QA_REPORT_TABLE_EDGE_ROWS rows in the grid table
+QA_REPORT_TABLE_EDGE_ROWS = 200
+# The per-run CSVs go into this subdirectory (next to the scripts); only the newest QA_REPORT_CSV_KEEP are kept
+QA_REPORT_CSV_DIR = "qa_report_csv"
+QA_REPORT_CSV_KEEP = 30
+
+def _prune_report_csvs(csv_dir):
+    """Deletes all but the newest QA_REPORT_CSV_KEEP per-run CSVs (their timestamped names sort by age)."""
+    csv_filenames = sorted(name for name in os.listdir(csv_dir) if name.startswith("sync_summary_report_") and name.endswith(".csv"))
+    for name in csv_filenames[:-QA_REPORT_CSV_KEEP]:
+        try:
+            os.remove(os.path.join(csv_dir, name))
+        except OSError as e:
+            logging.warning(f"Could not remove old detailed action log CSV {name}: {e}")
+
 def clean_jira_description_for_report(description):
     """Removes Jira's markdown-like syntax for a cleaner report view."""
     if not description: return ""
-    # Remove panel macros
-    text = re.sub(r"\{panel:.*?\}", "", description, flags=re.DOTALL)
-    # Remove color macros
-    text = re.sub(r"\{color:.*?\}", "", text, flags=re.DOTALL)
-    # Remove h-level headers
-    text = re.sub(r"h\d\.", "", text)
-    # Remove asterisks (bold) and pluses
-    text = text.replace("*", "").replace("+", "")
-    # Replace table row separators with newlines and clean up
-    text = re.sub(r"\|", "\n", text)
+    # Remove panel/color macros and h-level headers
+    text = _REPORT_MARKUP_RE.sub("", description)
+    # Remove asterisks (bold) and pluses, replace table row separators with newlines
+    text = text.translate(_REPORT_CHAR_TABLE)
     # Remove excessive blank lines
-    text = re.sub(r'\n\s*\n', '\n', text).strip()
+    text = _BLANK_LINES_RE.sub('\n', text).strip()
     return text
 
 def generate_qa_summary_table(actions_log, all_jira_issues_map, all_airtable_records_map):
@@ -45,86 +63,100 @@ def generate_qa_summary_table(actions_log, all_jira_issues_map, all_airtable_rec
     
     # --- Prepare Data & Stats ---
     table_data = []
-    report_timestamp = datetime.now().strftime('%Y-%m-%d %H:%M:%S')
+    report_time = datetime.now()
+    report_timestamp = report_time.strftime('%Y-%m-%d %H:%M:%S')
     sync_mode = "QA (Dry Run)" if common_utils.DRY_RUN else "PROD (Live)"
     status_stats = defaultdict(lambda: {"success": 0, "error": 0})
 
+    # Rows are plain lists in header order; col maps a header to its index
+    col = {h: i for i, h in enumerate(detailed_headers)}
+    empty_row = [""] * len(detailed_headers)
+    include_description = common_utils.QA_REPORT_INCLUDE_DESCRIPTION_FLAG
+    # jira_key -> (title, status, cleaned description or None). The same issue can appear in several
+    # actions (e.g. Phase 3 logs), so its attributes are read and its description cleaned only once.
+    jira_cells_by_key = {}
+
     for action in actions_log:
-        row_dict = {h: "" for h in detailed_headers}
-        row_dict["Sync Mode"] = sync_mode
-        row_dict["Timestamp"] = report_timestamp
+        row = empty_row.copy()
+        row[col["Sync Mode"]] = sync_mode
+        row[col["Timestamp"]] = report_timestamp
         
         sync_type = "Unknown"
         if action.get("type") == "Jira->Airtable (New)": sync_type = "Jira -> Airtable"
         elif action.get("type") == "Airtable->Jira (New)": sync_type = "Airtable -> Jira"
         elif action.get("type") == "Sync": sync_type = "Synced/Updated"
-        row_dict["Sync Status"] = sync_type
+        row[col["Sync Status"]] = sync_type
 
         # Populate data from Jira and Airtable objects
         jira_key = action.get("jira_key")
         airtable_id = action.get("airtable_id")
         
         if jira_key:
-            row_dict["Jira Issue Key"] = jira_key
-            jira_issue_obj = all_jira_issues_map.get(jira_key)
-            if jira_issue_obj:
-                row_dict["Jira Issue Title"] = jira_issue_obj.fields.summary
-                row_dict["JIRA Issue Status"] = jira_issue_obj.fields.status.name
-                if common_utils.QA_REPORT_INCLUDE_DESCRIPTION_FLAG:
-                    raw_desc = str(getattr(jira_issue_obj.fields, 'description', "") or "")
-                    row_dict["Jira Description"] = clean_jira_description_for_report(raw_desc)
+            row[col["Jira Issue Key"]] = jira_key
+            jira_cells = jira_cells_by_key.get(jira_key)
+            if jira_cells is None:
+                jira_issue_obj = all_jira_issues_map.get(jira_key)
+                jira_cells = ()
+                if jira_issue_obj:
+                    issue_fields = jira_issue_obj.fields
+                    cleaned_desc = None
+                    if include_description:
+                        raw_desc = str(getattr(issue_fields, 'description', "") or "")
+                        cleaned_desc = clean_jira_description_for_report(raw_desc)
+                    jira_cells = (issue_fields.summary, issue_fields.status.name, cleaned_desc)
+                jira_cells_by_key[jira_key] = jira_cells
+            if jira_cells:
+                row[col["Jira Issue Title"]], row[col["JIRA Issue Status"]], cleaned_desc = jira_cells
+                if include_description:
+                    row[col["Jira Description"]] = cleaned_desc
         
         if airtable_id:
-            row_dict["Airtable ID"] = airtable_id
+            row[col["Airtable ID"]] = airtable_id
             airtable_record_obj = all_airtable_records_map.get(airtable_id)
             if airtable_record_obj:
                 fields = airtable_record_obj.get('fields', {})
-                row_dict["Airtable Test ID"] = str(fields.get(common_utils.AIRTABLE_TEST_ID_FIELD, ""))
-                row_dict["Airtable Exp ID"] = str(fields.get(common_utils.AIRTABLE_EXPERIMENT_ID_FIELD, ""))
-                row_dict["Airtable Full Name"] = str(fields.get(common_utils.AIRTABLE_HEADLINE_FIELD, ""))
-                row_dict["Airtable Status"] = str(fields.get(common_utils.AIRTABLE_STATUS_FIELD, ""))
+                row[col["Airtable Test ID"]] = str(fields.get(common_utils.AIRTABLE_TEST_ID_FIELD, ""))
+                row[col["Airtable Exp ID"]] = str(fields.get(common_utils.AIRTABLE_EXPERIMENT_ID_FIELD, ""))
+                row[col["Airtable Full Name"]] = str(fields.get(common_utils.AIRTABLE_HEADLINE_FIELD, ""))
+                row[col["Airtable Status"]] = str(fields.get(common_utils.AIRTABLE_STATUS_FIELD, ""))
 
         # Handle simulated data for new items
         if sync_type == "Airtable -> Jira":
-            row_dict["Jira Issue Key"] = action.get("new_jira_key", "(simulated)")
-            row_dict["Jira Issue Title"] = action.get("airtable_summary", "")
-            airtable_status_for_map = row_dict["Airtable Status"]
-            row_dict["JIRA Issue Status"] = common_utils.STATUS_MAPPING_AIRTABLE_TO_JIRA.get(airtable_status_for_map, "(unknown map)")
-            if common_utils.QA_REPORT_INCLUDE_DESCRIPTION_FLAG and airtable_record_obj:
+            row[col["Jira Issue Key"]] = action.get("new_jira_key", "(simulated)")
+            row[col["Jira Issue Title"]] = action.get("airtable_summary", "")
+            airtable_status_for_map = row[col["Airtable Status"]]
+            row[col["JIRA Issue Status"]] = common_utils.STATUS_MAPPING_AIRTABLE_TO_JIRA.get(airtable_status_for_map, "(unknown map)")
+            if include_description and airtable_record_obj:
                 raw_simulated_desc = common_utils.format_full_jira_description(
                     airtable_id, airtable_record_obj.get('fields', {}),
                     common_utils.AIRTABLE_BASE_ID_CONFIG, common_utils.AIRTABLE_TABLE_NAME_CONFIG
                 )
-                row_dict["Jira Description"] = clean_jira_description_for_report(raw_simulated_desc)
+                row[col["Jira Description"]] = clean_jira_description_for_report(raw_simulated_desc)
         elif sync_type == "Jira -> Airtable":
-            row_dict["Airtable ID"] = action.get("new_airtable_id", "(simulated)")
-            row_dict["Airtable Full Name"] = f"{common_utils.JIRA_NOT_EVALUATED_PREFIX_CONST} {action.get('original_summary', '')}"
-            row_dict["Airtable Status"] = "Idea: Backlog"
-            row_dict["Airtable Test ID"] = "(new)"
-            row_dict["Airtable Exp ID"] = "(new)"
+            row[col["Airtable ID"]] = action.get("new_airtable_id", "(simulated)")
+            row[col["Airtable Full Name"]] = f"{common_utils.JIRA_NOT_EVALUATED_PREFIX_CONST} {action.get('original_summary', '')}"
+            row[col["Airtable Status"]] = "Idea: Backlog"
+            row[col["Airtable Test ID"]] = "(new)"
+            row[col["Airtable Exp ID"]] = "(new)"
 
         # Update stats and format action summary
-        status_key = f"{sync_type} | {row_dict['Airtable Status'] or 'N/A'}"
+        status_key = (sync_type, row[col["Airtable Status"]] or "N/A")
         if action.get("error"):
-            row_dict["Sync Status"] = "Error"
+            row[col["Sync Status"]] = "Error"
             status_stats[status_key]["error"] += 1
-            row_dict["Sync Actions / Error"] = str(action["error"])
+            row[col["Sync Actions / Error"]] = str(action["error"])
         else:
             status_stats[status_key]["success"] += 1
-            row_dict["Sync Actions / Error"] = "\n".join(action.get("actions", []))
+            row[col["Sync Actions / Error"]] = "\n".join(map(common_utils.format_sync_action, action.get("actions", [])))
             
-        table_data.append(row_dict)
+        table_data.append(row)
         
     # --- Format and Write Summary Table (Totals) ---
     summary_headers = ["QA / Prod", "Sync Type", "Airtable Record Status", "Jira Issue Status", "Success", "Error", "Total"]
     summary_rows = []
     total_success, total_error = 0, 0
     
-    for status_key, counts in sorted(status_stats.items()):
-        if '|' not in status_key:
-            logging.warning(f"Skipping malformed status_key in summary report: '{status_key}'")
-            continue
-        sync_type_from_key, airtable_status_from_key = [s.strip() for s in status_key.split('|')]
+    for (sync_type_from_key, airtable_status_from_key), counts in sorted(status_stats.items()):
         jira_status = common_utils.STATUS_MAPPING_AIRTABLE_TO_JIRA.get(airtable_status_from_key, "N/A")
         if sync_type_from_key == "Jira -> Airtable": jira_status = "N/A"
         
@@ -139,31 +171,52 @@ def generate_qa_summary_table(actions_log, all_jira_issues_map, all_airtable_rec
                          
     formatted_summary_table = tabulate(summary_rows, headers=summary_headers, tablefmt="grid")
 
+    report_dir = os.path.dirname(os.path.abspath(__file__))
+
+    # --- Spill big runs to CSV and keep only the edges in the grid table ---
+    table_rows = table_data
+    if len(table_data) > 2 * QA_REPORT_TABLE_EDGE_ROWS:
+        # One CSV per run, so the elided markers appended to the txt by earlier runs keep pointing at their own rows
+        csv_filename = f"sync_summary_report_{report_time.strftime('%Y%m%d_%H%M%S')}.csv"
+        csv_dir = os.path.join(report_dir, QA_REPORT_CSV_DIR)
+        csv_filepath = os.path.join(csv_dir, csv_filename)
+        try:
+            os.makedirs(csv_dir, exist_ok=True)
+            with open(csv_filepath, "w", encoding="utf-8", newline="") as f:
+                writer = csv.writer(f)
+                writer.writerow(detailed_headers)
+                writer.writerows(table_data)
+            _prune_report_csvs(csv_dir)
+            elided_count = len(table_data) - 2 * QA_REPORT_TABLE_EDGE_ROWS
+            elided_marker = [f"... {elided_count} rows elided, see {QA_REPORT_CSV_DIR}/{csv_filename} ..."] + [""] * (len(detailed_headers) - 1)
+            table_rows = table_data[:QA_REPORT_TABLE_EDGE_ROWS] + [elided_marker] + table_data[-QA_REPORT_TABLE_EDGE_ROWS:]
+            logging.info(f"Wrote the full detailed action log ({len(table_data)} rows) to {csv_filepath}")
+        except Exception as e:
+            logging.error(f"Failed to write the detailed action log CSV, keeping the full table: {e}")
+
     # --- Format and Write Detailed Table ---
-    detailed_table_rows = [[row.get(h, "") for h in detailed_headers] for row in table_data]
     max_width = 45 # Keep a reasonable max width
     if common_utils.QA_REPORT_INCLUDE_DESCRIPTION_FLAG: max_width = 60
-    formatted_detailed_table = tabulate(detailed_table_rows, headers=detailed_headers, tablefmt="grid", maxcolwidths=max_width)
+    formatted_detailed_table = tabulate(table_rows, headers=detailed_headers, tablefmt="grid", maxcolwidths=max_width)
     
     # --- Write to File and Console (Summary on Top) ---
     report_filename = "sync_summary_report.txt"
-    report_filepath = os.path.join(os.path.dirname(os.path.abspath(__file__)), report_filename)
+    report_filepath = os.path.join(report_dir, report_filename)
     
+    # Both sections are assembled once and go out in a single write to the file and to the console
+    report_body = (
+        f"--- RUN TOTALS BY STATUS ---\n{formatted_summary_table}\n\n"
+        f"--- DETAILED ACTION LOG ---\n{formatted_detailed_table}"
+    )
     try:
         with open(report_filepath, "a", encoding="utf-8") as f:
-            f.write(f"\n\n========================= SCRIPT RUN SUMMARY: {report_timestamp} ({sync_mode}) =========================\n\n")
-            f.write("--- RUN TOTALS BY STATUS ---\n")
-            f.write(formatted_summary_table)
-            f.write("\n\n--- DETAILED ACTION LOG ---\n")
-            f.write(formatted_detailed_table)
-            f.write("\n")
+            f.write(
+                f"\n\n========================= SCRIPT RUN SUMMARY: {report_timestamp} ({sync_mode}) =========================\n\n"
+                f"{report_body}\n"
+            )
         logging.info(f"Successfully wrote full summary to {report_filepath}")
         
-        print("\n--- RUN TOTALS BY STATUS ---")
-        print(formatted_summary_table)
-        print("\n--- DETAILED ACTION LOG ---")
-        print(formatted_detailed_table)
-        print(f"\nFull report also saved to: {report_filepath}\n")
+        sys.stdout.write(f"\n{report_body}\n\nFull report also saved to: {report_filepath}\n\n")
 
     except Exception as e:
         logging.error(f"Failed to write QA summary report to file: {e}")
\ No newline at end of file